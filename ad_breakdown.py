@@ -1,13 +1,24 @@
 import streamlit as st
 import pandas as pd
-from google.cloud import bigquery  # If you're using BigQuery
 import requests  # If you're calling the Graph API directly
 import json
-from google.oauth2 import service_account
 import matplotlib.pyplot as plt
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from backends import get_backend
+from bq_client import render_connection_report
+from data_loader import get_tables, render_data_status
+from data_store import render_memory_report, track_session
+from downsample import downsample
+from figure_cache import cached_figure, render_figure_cache_report
+from rollups import rollup_ref
+from sections import render_timing_report, section, start_page
+from breakdown_cube import day_range, get_cube, group_positions, groups_in
+from metrics import breakdown_kpis, group_totals, performance_series
+
+# Shared tables are read-only; copy-on-write keeps them that way (see data_store.share_tables)
+pd.set_option("mode.copy_on_write", True)
 
 # Set page components
 st.set_page_config(page_title="SP Bizz Overview", layout="wide", page_icon="🪧")
@@ -29,13 +40,8 @@ PROJECT_ID = "bizbuddydemo-v3"
 FB_PAGE_ID = 12101296
 IG_USER_ID = 17841400708882174
 
-# Load credentials and project ID from st.secrets
-credentials = service_account.Credentials.from_service_account_info(
-    st.secrets["gcp_service_account"]
-)
-
-# Initialize BigQuery client
-client = bigquery.Client(credentials=credentials, project=PROJECT_ID)
+# Shared warehouse backend (BigQuery, or local fixtures with DATA_BACKEND=local)
+backend = get_backend(PROJECT_ID)
 
 # Sample mock data
 def get_sample_data():
@@ -56,135 +62,268 @@ def get_sample_data():
     return data
 
 
-# Basic Ad Data
-def pull_ad_data(dataset_id, table_id):
-    # Build the table reference
-    table_ref = f"{PROJECT_ID}.{dataset_id}.{table_id}"
-    # Query to fetch all data from the table
-    query = f"SELECT * FROM `{table_ref}` WHERE CAST(account_id AS STRING) = '{FB_PAGE_ID}'"
-    try:
-        # Execute the query
-        query_job = client.query(query)
-        result = query_job.result()
-        # Convert the result to a DataFrame
-        data = result.to_dataframe()
-        return data
-    except Exception as e:
-        st.error(f"Error fetching data: {e}")
-        return None
-
-
-
-@st.cache_data
-def get_data():
-    #Get basic ads
-    ad_dataset_id = "facebook_ads"
-    ad_table_id = "basic_ad"
-    basic_ad_df = pull_ad_data(ad_dataset_id, ad_table_id)
-
-    #Get ad set
-    adset_dataset_id = "facebook_ads"
-    adset_table_id = "basic_ad_set"
-    basic_adset_df = pull_ad_data(adset_dataset_id, adset_table_id)
-
-    #Get campaign
-    campaign_dataset_id = "facebook_ads"
-    campaign_table_id = "basic_campaign"
-    basic_campaign_df = pull_ad_data(campaign_dataset_id, campaign_table_id)
-
-    #Get demo set
-    demo_dataset_id = "client"
-    demo_table_id = "ad_demographics"
-    basic_demo_df = pull_ad_data(demo_dataset_id, demo_table_id)
-
-    #Get delivery device
-    device_dataset_id = "facebook_ads"
-    device_table_id = "delivery_device"
-    basic_device_df = pull_ad_data(device_dataset_id, device_table_id)
-
-    #Get delivery platform and device
-    platform_dataset_id = "facebook_ads"
-    platform_table_id = "delivery_platform"
-    basic_platform_df = pull_ad_data(platform_dataset_id, platform_table_id)
-
-    #Get delivery platform and device
-    url_dataset_id = "facebook_ads_facebook_ads"
-    url_table_id = "facebook_ads__url_report"
-    basic_url_df = pull_ad_data(url_dataset_id, url_table_id)
-
-    #return all dfs
-    return basic_ad_df, basic_adset_df, basic_campaign_df, basic_demo_df, basic_device_df, basic_platform_df, basic_url_df
+# Account filter for the ad tables
+AD_ACCOUNT_FILTER = f"CAST(account_id AS STRING) = '{FB_PAGE_ID}'"
+AD_METRICS = ["spend", "impressions", "inline_link_clicks"]
+
+# Most lines on the Performance Over Time chart before the rest fold into "Other"
+MAX_CHART_GROUPS = 10
+
+# Tables this page reads (the daily rollups from rollups.py), the columns it needs,
+# and the date column used for incremental cache syncs
+TABLES = {
+    "daily_campaign": {
+        "table_ref": rollup_ref(PROJECT_ID, "daily_campaign"),
+        "where": AD_ACCOUNT_FILTER,
+        "columns": ["date", "campaign_name"] + AD_METRICS,
+        "date_col": "date",
+    },
+    "daily_ad_set": {
+        "table_ref": rollup_ref(PROJECT_ID, "daily_ad_set"),
+        "where": AD_ACCOUNT_FILTER,
+        "columns": ["date", "adset_name"] + AD_METRICS,
+        "date_col": "date",
+    },
+    "daily_ad": {
+        "table_ref": rollup_ref(PROJECT_ID, "daily_ad"),
+        "where": AD_ACCOUNT_FILTER,
+        "columns": ["date", "ad_name"] + AD_METRICS,
+        "date_col": "date",
+    },
+    "daily_demographics": {
+        "table_ref": rollup_ref(PROJECT_ID, "daily_demographics"),
+        "where": AD_ACCOUNT_FILTER,
+        "columns": ["date", "Breakdown", "Group"] + AD_METRICS,
+        "date_col": "date",
+    },
+    "daily_device": {
+        "table_ref": rollup_ref(PROJECT_ID, "daily_device"),
+        "where": AD_ACCOUNT_FILTER,
+        "columns": ["date", "device_platform", "spend"],
+        "date_col": "date",
+    },
+    "daily_platform": {
+        "table_ref": rollup_ref(PROJECT_ID, "daily_platform"),
+        "where": AD_ACCOUNT_FILTER,
+        "columns": ["date", "publisher_platform", "spend"],
+        "date_col": "date",
+    },
+    "daily_url_host": {
+        "table_ref": rollup_ref(PROJECT_ID, "daily_url_host"),
+        "where": AD_ACCOUNT_FILTER,
+        "columns": ["date", "url_host", "spend", "clicks", "impressions"],
+        "date_col": "date",
+    },
+}
+
+# Table behind each option of the "View breakdown by" selectbox
+PIE_TABLES = {
+    "Device": "daily_device",
+    "Platform": "daily_platform",
+}
+
+def get_data(*names):
+    # Fetch tables the first time a section asks for them; later calls read the shared cache
+    return get_tables(backend, TABLES, names)
+
+
+@section("Performance chart")
+def draw_performance_chart(df, cube, days, columns, group_col, selected_breakdown):
+    # === Time Series Chart with Dynamic Metric Selection ===
+    # Fragment: switching the metric redraws only this chart from the cached cube
+    st.markdown("### 📈 Performance Over Time")
+    
+    # Let user pick metric
+    metric_options = {
+        "Spend": "spend",
+        "Impressions": "impressions",
+        "Clicks": "inline_link_clicks",
+        "CTR (Click-through Rate)": "ctr",
+        "CPC (Cost per Click)": "cpc"
+    }
+    selected_metric_label = st.selectbox("Select metric to display:", list(metric_options.keys()))
+    selected_metric = metric_options[selected_metric_label]
+    
+    def build_chart():
+        # Up to MAX_CHART_GROUPS lines from the cached cube; the rest fold into "Other"
+        daily_summary = performance_series(cube, selected_metric, days, columns, group_col, MAX_CHART_GROUPS)
+        # Long ranges: LTTB within each line down to the chart's point budget
+        daily_summary = downsample(daily_summary, "date", selected_metric, group_col=group_col)
+
+        # Plot
+        fig = px.line(
+            daily_summary,
+            x="date",
+            y=selected_metric,
+            color=group_col,
+            title=f"{selected_metric_label} Over Time by {selected_breakdown}",
+            template="plotly_white",
+            labels={selected_metric: selected_metric_label}
+        )
+        return fig
+
+    params = (selected_breakdown, selected_metric, days.start, days.stop, tuple(columns.tolist()))
+    fig = cached_figure("performance_chart", [df], params, build_chart)
+    st.plotly_chart(fig, use_container_width=True)
+
+
+@section("Device / platform pie")
+def draw_delivery_pie(start_date, end_date):
+    # Fragment: switching the view reruns only the pie
+    st.subheader("📊 Platform & Device Breakdown")
+
+    # Select view
+    view_option = st.selectbox("View breakdown by:", list(PIE_TABLES.keys()), key="pie_view")
+
+    # Filter ad-level data
+    pie_df = get_data(PIE_TABLES[view_option])[PIE_TABLES[view_option]]
+
+    # Choose column and label
+    if view_option == "Device":
+        pie_col = "device_platform"
+        display_label = "Spend by Device"
+    else:
+        pie_col = "publisher_platform"
+        display_label = "Spend by Platform"
+
+    # Build pie chart
+    if pie_col in pie_df.columns:
+        def build_pie():
+            pie_cube = get_cube(pie_df, "date", pie_col, ["spend"])
+            pie_summary = group_totals(pie_cube, "spend", start_date, end_date, "Category").rename(columns={"spend": "Spend"})
+
+            fig_pie = px.pie(
+                pie_summary,
+                names='Category',
+                values='Spend',
+                title=display_label,
+                template='plotly_white'
+            )
+            fig_pie.update_traces(textinfo='percent+label')
+            return fig_pie
+
+        fig_pie = cached_figure("delivery_pie", [pie_df], (view_option, start_date, end_date), build_pie)
+        st.plotly_chart(fig_pie, use_container_width=True)
+    else:
+        st.info(f"{pie_col} data not available.")
+
+
+@section("URL breakdown")
+def draw_url_breakdown(start_date, end_date):
+    # Fragment: switching the metric reruns only the URL chart
+    st.subheader("🔗 URL Performance Breakdown")
+
+    basic_url_df = get_data("daily_url_host")["daily_url_host"]
+
+    # Metric selection
+    metric_options = {
+        "Spend": "spend",
+        "Clicks": "clicks",
+        "Impressions": "impressions",
+    }
+    selected_url_metric_label = st.selectbox("Select metric for URL view:", list(metric_options.keys()), key="url_metric")
+    selected_url_metric = metric_options[selected_url_metric_label]
+
+    # Group by base URL
+    if "url_host" in basic_url_df.columns and selected_url_metric in basic_url_df.columns:
+        def build_url_chart():
+            url_cube = get_cube(basic_url_df, "date", "url_host", list(metric_options.values()))
+            url_summary = group_totals(url_cube, selected_url_metric, start_date, end_date, "url_host")
+
+            fig_url = px.bar(
+                url_summary,
+                x="url_host",
+                y=selected_url_metric,
+                title=f"{selected_url_metric_label} by URL",
+                template="plotly_white"
+            )
+            fig_url.update_layout(xaxis_title="Base URL", yaxis_title=selected_url_metric_label)
+            return fig_url
+
+        fig_url = cached_figure("url_chart", [basic_url_df], (selected_url_metric, start_date, end_date), build_url_chart)
+        st.plotly_chart(fig_url, use_container_width=True)
+    else:
+        st.info("Required fields not available in `basic_url_df`.")
+
 
 # Layout
 def main():
 
-    basic_ad_df, basic_adset_df, basic_campaign_df, basic_demo_df, basic_device_df, basic_platform_df, basic_url_df = get_data()
-
+    start_page()
     df = get_sample_data()
 
     st.title("📊 Ad Performance Overview")
-
-    # === REAL DATA SOURCES (assumed already loaded globally) ===
-    # basic_campaign_df, basic_adset_df, basic_ad_df, basic_demo_df
+    track_session()
+    render_memory_report()
+    render_connection_report()
 
     # === Breakdown options mapping ===
     breakdown_options = {
         "Campaign": {
-            "df": basic_campaign_df,
+            "table": "daily_campaign",
             "group_col": "campaign_name"
         },
         "Ad Set": {
-            "df": basic_adset_df,
+            "table": "daily_ad_set",
             "group_col": "adset_name"
         },
         "Ad": {
-            "df": basic_ad_df,
+            "table": "daily_ad",
             "group_col": "ad_name"
         },
         "Age": {
-            "df": basic_demo_df,
+            "table": "daily_demographics",
             "group_col": "Group",
             "filter_on": "Breakdown",
             "filter_value": "Age"
         },
         "Age and Gender": {
-            "df": basic_demo_df,
+            "table": "daily_demographics",
             "group_col": "Group",
             "filter_on": "Breakdown",
             "filter_value": "Age and Gender"
         },
         "Region": {
-            "df": basic_demo_df,
+            "table": "daily_demographics",
             "group_col": "Group",
             "filter_on": "Breakdown",
             "filter_value": "Region"
         },
         "DMA": {
-            "df": basic_demo_df,
+            "table": "daily_demographics",
             "group_col": "Group",
             "filter_on": "Breakdown",
             "filter_value": "DMA Region"
         },
     }
 
+    # Pull only the tables the current selections show, together in one round trip;
+    # the sections below then read them from the shared cache
+    tables = get_data(
+        breakdown_options[st.session_state.get("breakdown", "Campaign")]["table"],
+        PIE_TABLES[st.session_state.get("pie_view", "Device")],
+        "daily_url_host",
+    )
+    render_data_status(TABLES, tables.keys())
+
     col_left, col_right = st.columns(2)
 
     # === User selects breakdown ===
-    selected_breakdown = st.selectbox("Break down by:", list(breakdown_options.keys()))
+    selected_breakdown = st.selectbox("Break down by:", list(breakdown_options.keys()), key="breakdown")
     breakdown_info = breakdown_options[selected_breakdown]
-    df = breakdown_info["df"].copy()
+    df = get_data(breakdown_info["table"])[breakdown_info["table"]]
     group_col = breakdown_info["group_col"]
     
-    # === Optional demo filtering ===
-    if "filter_on" in breakdown_info:
-        df = df[df[breakdown_info["filter_on"]] == breakdown_info["filter_value"]]
-    
-    # Convert date column and sort
-    df['date'] = pd.to_datetime(df['date'])
+    # === Daily (day x group) cube for this breakdown, built once per data refresh ===
+    # Demographic options are one slice of the stacked daily_demographics rollup
+    cube = get_cube(
+        df, "date", group_col, AD_METRICS,
+        breakdown_info.get("filter_on"), breakdown_info.get("filter_value"),
+    )
     
-    if not df.empty:
-        min_date = df['date'].min()
-        max_date = df['date'].max()
+    if len(cube["days"]):
+        min_date = cube["days"][0]
+        max_date = cube["days"][-1]
         default_start = max_date - pd.Timedelta(days=30)
         selected_dates = st.date_input("Select date range:", [default_start, max_date])
 
@@ -198,173 +337,49 @@ def main():
             st.warning("Please select a valid date range.")
             return
     
-        # Force df['date'] to datetime and filter
-        df['date'] = pd.to_datetime(df['date'])
-        df = df[(df["date"] >= start_date) & (df["date"] <= end_date)]
+        # Rows of the cube inside the selected window
+        days = day_range(cube, start_date, end_date)
     else:
         st.warning("No data available for the selected breakdown.")
         return
 
     # === Multiselect breakdown filter ===
-    group_values = df[group_col].dropna().unique().tolist()
+    group_values = groups_in(cube, days)
     with st.expander(f"🔍 Filter by {selected_breakdown} values", expanded=False):
         selected_groups = st.multiselect(
             f"Select one or more {selected_breakdown} values:",
             options=group_values,
             default=group_values
         )
-    df = df[df[group_col].isin(selected_groups)]
+    columns = group_positions(cube, selected_groups)
 
 
     # === KPI summary ===
     st.markdown("### 📌 Summary Metrics")
+    kpis = breakdown_kpis(cube, days, columns)
     kpi_col1, kpi_col2, kpi_col3 = st.columns(3)
     with kpi_col1:
-        st.metric("Total Spend", f"${df['spend'].sum():,.0f}")
+        st.metric("Total Spend", f"${kpis['spend']:,.0f}")
     with kpi_col2:
-        st.metric("Total Impressions", f"{df['impressions'].sum():,.0f}")
+        st.metric("Total Impressions", f"{kpis['impressions']:,.0f}")
     with kpi_col3:
-        st.metric("Total Link Clicks", f"{df['inline_link_clicks'].sum():,.0f}")
-
-    # === Time Series Chart with Dynamic Metric Selection ===
-    st.markdown("### 📈 Performance Over Time")
-    
-    # Let user pick metric
-    metric_options = {
-        "Spend": "spend",
-        "Impressions": "impressions",
-        "Clicks": "inline_link_clicks",
-        "CTR (Click-through Rate)": "ctr",
-        "CPC (Cost per Click)": "cpc"
-    }
-    selected_metric_label = st.selectbox("Select metric to display:", list(metric_options.keys()))
-    selected_metric = metric_options[selected_metric_label]
-    
-    # Group and calculate daily metrics
-    daily_summary = (
-        df.groupby(["date", group_col])
-        .agg({
-            "spend": "sum",
-            "impressions": "sum",
-            "inline_link_clicks": "sum"
-        })
-        .reset_index()
-    )
-    
-    # Compute CTR and CPC
-    daily_summary["ctr"] = (daily_summary["inline_link_clicks"] / daily_summary["impressions"])
-    daily_summary["cpc"] = daily_summary["spend"] / daily_summary["inline_link_clicks"]
-    daily_summary = daily_summary.replace([float("inf"), -float("inf")], pd.NA).fillna(0)
-    
-    # Plot
-    fig = px.line(
-        daily_summary,
-        x="date",
-        y=selected_metric,
-        color=group_col,
-        title=f"{selected_metric_label} Over Time by {selected_breakdown}",
-        template="plotly_white",
-        labels={selected_metric: selected_metric_label}
-    )
-    st.plotly_chart(fig, use_container_width=True)
+        st.metric("Total Link Clicks", f"{kpis['inline_link_clicks']:,.0f}")
 
+    draw_performance_chart(df, cube, days, columns, group_col, selected_breakdown)
 
     st.markdown("### 🎨 Creative Performance Breakdown")
     
     col_left, col_right = st.columns(2)
 
     with col_left:
-        st.subheader("📊 Platform & Device Breakdown")
-    
-        # Select view
-        view_option = st.selectbox("View breakdown by:", ["Device", "Platform"])
-    
-        # Copy and filter ad-level data
-        if view_option == "Device":
-            pie_df = basic_device_df.copy()
-        else:
-            pie_df = basic_platform_df.copy()
+        draw_delivery_pie(start_date, end_date)
 
-        pie_df['date'] = pd.to_datetime(pie_df['date'])
-        pie_df = pie_df[
-            (pie_df['date'] >= start_date) & 
-            (pie_df['date'] <= end_date)
-        ]
-    
-        # Choose column and label
-        if view_option == "Device":
-            pie_col = "device_platform"
-            display_label = "Spend by Device"
-        else:
-            pie_col = "publisher_platform"
-            display_label = "Spend by Platform"
-    
-        # Build pie chart
-        if pie_col in pie_df.columns:
-            pie_summary = (
-                pie_df.groupby(pie_col)['spend']
-                .sum()
-                .reset_index()
-                .rename(columns={pie_col: 'Category', 'spend': 'Spend'})
-            )
-    
-            fig_pie = px.pie(
-                pie_summary,
-                names='Category',
-                values='Spend',
-                title=display_label,
-                template='plotly_white'
-            )
-            fig_pie.update_traces(textinfo='percent+label')
-            st.plotly_chart(fig_pie, use_container_width=True)
-        else:
-            st.info(f"{pie_col} data not available.")
-
-
-    # --- RIGHT: Video Watch-Through Rate ---
+    # --- RIGHT: URL performance ---
     with col_right:
-        st.subheader("🔗 URL Performance Breakdown")
-
-        # Clean and filter
-        url_df = basic_url_df.copy()
-        url_df['date'] = pd.to_datetime(url_df['date_day'])
-    
-        # Filter by selected date range
-        url_df = url_df[
-            (url_df['date'] >= start_date) &
-            (url_df['date'] <= end_date)
-        ]
-    
-        # Metric selection
-        metric_options = {
-            "Spend": "spend",
-            "Clicks": "clicks",
-            "Impressions": "impressions",
-        }
-        selected_url_metric_label = st.selectbox("Select metric for URL view:", list(metric_options.keys()), key="url_metric")
-        selected_url_metric = metric_options[selected_url_metric_label]
-    
-        # Group by base URL
-        if "url_host" in url_df.columns and selected_url_metric in url_df.columns:
-            url_summary = (
-                url_df.groupby("url_host")[selected_url_metric]
-                .sum()
-                .reset_index()
-                .sort_values(by=selected_url_metric, ascending=False)
-            )
-    
-            fig_url = px.bar(
-                url_summary,
-                x="url_host",
-                y=selected_url_metric,
-                title=f"{selected_url_metric_label} by URL",
-                template="plotly_white"
-            )
-            fig_url.update_layout(xaxis_title="Base URL", yaxis_title=selected_url_metric_label)
-            st.plotly_chart(fig_url, use_container_width=True)
-        else:
-            st.info("Required fields not available in `basic_url_df`.")
+        draw_url_breakdown(start_date, end_date)
 
+    render_timing_report()
+    render_figure_cache_report()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+# Most post markers a full-width chart can separate (a few pixels each); denser posting days get clustered
+MAX_POST_MARKERS = 300
+CAPTION_PREVIEW = 50
+
+
+def post_annotations(dates, captions, max_markers=MAX_POST_MARKERS):
+    """
+    One marker per posting day, or per bucket of consecutive days when there are more
+    posting days than max_markers, with hover text built by vectorized string ops.
+
+    Args:
+        dates: datetime64 day of each post.
+        captions: Caption of each post (may be missing).
+        max_markers: Upper bound on markers returned.
+
+    Returns:
+        DataFrame with x (first day in the marker), posts and hover, in date order.
+    """
+    posts = pd.DataFrame({"day": pd.Series(dates).to_numpy(), "caption": pd.Series(captions).to_numpy()})
+    posts = posts.dropna(subset=["day"]).sort_values("day", kind="stable")
+    if posts.empty:
+        return pd.DataFrame({"x": pd.Series(dtype="datetime64[ns]"), "posts": pd.Series(dtype="int64"), "hover": pd.Series(dtype="object")})
+
+    posts["preview"] = posts["caption"].astype("string").str.slice(0, CAPTION_PREVIEW) + "..."
+
+    # Bucket width in days: 1 unless the posting days would overflow max_markers
+    offsets = ((posts["day"] - posts["day"].iloc[0]) // pd.Timedelta(days=1)).to_numpy()
+    n_days = posts["day"].nunique()
+    width = 1 if n_days <= max_markers else int(np.ceil((offsets[-1] + 1) / max_markers))
+    posts["bucket"] = offsets // width
+
+    markers = posts.groupby("bucket", sort=True).agg(
+        x=("day", "min"), last=("day", "max"), posts=("day", "size"), preview=("preview", "first")
+    )
+    span = np.where(
+        markers["last"] > markers["x"],
+        markers["x"].dt.strftime("%b %d") + " – " + markers["last"].dt.strftime("%b %d, %Y"),
+        markers["x"].dt.strftime("%b %d, %Y"),
+    )
+    count = np.where(markers["posts"] > 1, " · " + markers["posts"].astype(str) + " posts", "")
+    # 'first' skips missing captions, so a cluster only says "No caption" when none of its posts has one
+    markers["hover"] = span + count + "<br>" + markers["preview"].fillna("No caption").astype(object)
+    return markers[["x", "posts", "hover"]].reset_index(drop=True)
+
+
+def add_post_annotations(fig, markers):
+    """
+    Draws post markers on a figure as two traces: every dotted full-height line in one
+    None-separated line trace, and the hover points in one scatter, both on a hidden
+    0-1 axis so they span the plot whatever the data range.
+    """
+    n = len(markers)
+    fig.update_layout(yaxis2=dict(overlaying="y", range=[0, 1], visible=False, fixedrange=True))
+
+    # x, x, None per marker with y 0, 1, None: one trace instead of one layout shape per post
+    line_x = np.empty(3 * n, dtype=object)
+    line_x[0::3] = line_x[1::3] = markers["x"].tolist()
+    line_y = np.tile(np.array([0, 1, None], dtype=object), n)
+    fig.add_trace(go.Scatter(
+        x=line_x,
+        y=line_y,
+        yaxis="y2",
+        mode="lines",
+        line=dict(dash="dot", color="gray", width=1),
+        opacity=0.3,
+        hoverinfo="skip",
+        showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=markers["x"],
+        y=np.ones(n),
+        yaxis="y2",
+        mode="markers",
+        marker=dict(size=8, color="rgba(0,0,0,0)"),
+        hovertext=markers["hover"],
+        hoverinfo="text",
+        cliponaxis=False,
+        showlegend=False
+    ))
+    return fig
@@ -0,0 +1,156 @@
+"""
+Warehouse backends behind the dashboards' queries.
+
+Every backend exposes run_arrow(sql) -> pyarrow.Table for the SQL that
+data_loader builds (ingest.py turns the tables into typed DataFrames), plus
+has_table/materialize for the daily rollups in rollups.py. Pick one with the
+DATA_BACKEND environment variable:
+
+    DATA_BACKEND=bigquery (default)  live BigQuery, credentials from st.secrets
+    DATA_BACKEND=local               Parquet fixtures under LOCAL_DATA_DIR, queried with
+                                     DuckDB (pip install duckdb); see make_fixtures.py
+"""
+import os
+import re
+import threading
+from pathlib import Path
+
+import streamlit as st
+from google.api_core.exceptions import NotFound
+
+from bq_client import get_client, get_storage_client
+
+
+BACKEND = os.environ.get("DATA_BACKEND", "bigquery")
+LOCAL_DATA_DIR = Path(os.environ.get("LOCAL_DATA_DIR", "fixtures"))
+
+# `project.dataset.table` references, and any other backtick-quoted identifier
+TABLE_REF_PATTERN = re.compile(r"`[^`.]+\.([^`.]+)\.([^`.]+)`")
+IDENTIFIER_PATTERN = re.compile(r"`([^`]+)`")
+
+
+class BigQueryBackend:
+    # Live warehouse through the shared, pooled BigQuery client
+    name = "bigquery"
+
+    def __init__(self, client, storage_client=None):
+        self.client = client
+        self.storage_client = storage_client
+
+    def run_arrow(self, query):
+        # Downloads through the shared Storage Read API client when there is one (paged REST otherwise)
+        return self.client.query(query).result().to_arrow(
+            bqstorage_client=self.storage_client, create_bqstorage_client=False
+        )
+
+    def has_table(self, table_ref):
+        try:
+            self.client.get_table(table_ref)
+        except NotFound:
+            return False
+        return True
+
+    def materialize(self, table_ref, select_sql, date_col, since=None):
+        """
+        Writes the result of select_sql to table_ref, partitioned by date_col. Without
+        `since` the table is rebuilt; with it, the days from `since` onward are replaced
+        in one transaction, so readers never see them missing.
+        """
+        if since is None:
+            script = f"CREATE OR REPLACE TABLE `{table_ref}` PARTITION BY `{date_col}` AS {select_sql}"
+        else:
+            script = (
+                "BEGIN TRANSACTION;\n"
+                f"DELETE FROM `{table_ref}` WHERE `{date_col}` >= '{since}';\n"
+                f"INSERT INTO `{table_ref}` {select_sql};\n"
+                "COMMIT TRANSACTION;"
+            )
+        self.client.query(script).result()
+
+
+class LocalBackend:
+    """
+    Serves the warehouse tables from Parquet fixtures laid out as
+    <data_dir>/<dataset>/<table>.parquet, e.g. fixtures/facebook_ads/basic_ad.parquet.
+    The project part of a table reference is ignored, so the pages' SQL runs as is.
+    Materialized tables are written back into the same layout.
+    """
+    name = "local"
+
+    def __init__(self, data_dir):
+        import duckdb  # Only needed offline
+
+        self.data_dir = Path(data_dir)
+        self.connection = duckdb.connect()
+        self.lock = threading.Lock()
+        self.tables = []
+        with self.lock:
+            self._discover()
+
+    def _discover(self):
+        # Register a view for every fixture not seen yet (call with the lock held)
+        for path in sorted(self.data_dir.glob("*/*.parquet")):
+            name = f"{path.parent.name}.{path.stem}"
+            if name in self.tables:
+                continue
+            self.connection.execute(
+                f"CREATE VIEW \"{name}\" AS SELECT * FROM read_parquet('{path.as_posix()}')"
+            )
+            self.tables.append(name)
+
+    def translate(self, query):
+        # BigQuery quoting to DuckDB: `project.dataset.table` -> "dataset.table", `col` -> "col"
+        query = TABLE_REF_PATTERN.sub(r'"\1.\2"', query)
+        return IDENTIFIER_PATTERN.sub(r'"\1"', query)
+
+    def run_arrow(self, query):
+        # A cursor per call, since one DuckDB connection can't be shared across threads
+        with self.lock:
+            cursor = self.connection.cursor()
+        result = cursor.execute(self.translate(query))
+        to_arrow = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+        return to_arrow()
+
+    def _path(self, table_ref):
+        dataset, table = table_ref.split(".")[-2:]
+        return self.data_dir / dataset / f"{table}.parquet"
+
+    def has_table(self, table_ref):
+        with self.lock:
+            self._discover()
+        return self._path(table_ref).exists()
+
+    def materialize(self, table_ref, select_sql, date_col, since=None):
+        # Same contract as BigQueryBackend.materialize, as a Parquet file swapped in atomically
+        path = self._path(table_ref)
+        query = self.translate(select_sql)
+        if since is not None and path.exists():
+            query = (
+                f"SELECT * FROM read_parquet('{path.as_posix()}') WHERE \"{date_col}\" < '{since}' "
+                f"UNION ALL {query}"
+            )
+
+        with self.lock:
+            cursor = self.connection.cursor()
+        # DuckDB sums BIGINTs into HUGEINT; cast back so the file matches BigQuery's INT64
+        relation = cursor.sql(query)
+        columns = [
+            f'CAST("{col}" AS BIGINT) AS "{col}"' if str(col_type) == "HUGEINT" else f'"{col}"'
+            for col, col_type in zip(relation.columns, relation.types)
+        ]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".parquet.tmp")
+        cursor.execute(f"COPY (SELECT {', '.join(columns)} FROM ({query})) TO '{tmp_path.as_posix()}' (FORMAT PARQUET)")
+        os.replace(tmp_path, path)
+        with self.lock:
+            self._discover()
+
+
+@st.cache_resource
+def get_backend(project_id):
+    # The configured backend, created once per process
+    if BACKEND == "local":
+        return LocalBackend(LOCAL_DATA_DIR)
+    if BACKEND != "bigquery":
+        raise ValueError(f"Unknown DATA_BACKEND {BACKEND!r}; expected 'bigquery' or 'local'")
+    return BigQueryBackend(get_client(project_id), get_storage_client(project_id))
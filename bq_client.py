@@ -0,0 +1,107 @@
+import threading
+
+import streamlit as st
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import bigquery
+from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
+
+import single_flight
+
+
+# Keep-alive connections per host; covers one per table in a concurrent load
+POOL_SIZE = 16
+
+
+@st.cache_resource
+def _clients():
+    # Every client created in this process, for the connection report
+    return {"clients": {}, "storage_clients": {}, "lock": threading.Lock()}
+
+
+def _credentials():
+    # Service account credentials from st.secrets
+    return service_account.Credentials.from_service_account_info(st.secrets["gcp_service_account"])
+
+
+@st.cache_resource
+def get_client(project_id):
+    """
+    Returns the process-wide BigQuery client for a project. Credentials are parsed
+    and the HTTP session is opened once, then reused by every rerun, session and page
+    running in this process.
+    """
+    # Load credentials from st.secrets
+    credentials = _credentials()
+
+    # One pooled, authorized session shared by all requests
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount("https://", adapter)
+
+    client = bigquery.Client(credentials=credentials, project=project_id, _http=session)
+
+    registry = _clients()
+    with registry["lock"]:
+        registry["clients"][project_id] = client
+    return client
+
+
+@st.cache_resource
+def get_storage_client(project_id):
+    """
+    Returns the process-wide BigQuery Storage Read API client for a project, so every
+    download shares one gRPC channel instead of opening and handshaking a new one.
+    None when google-cloud-bigquery-storage is not installed (downloads then page
+    through the REST API on the pooled client).
+    """
+    try:
+        from google.cloud import bigquery_storage
+    except ImportError:
+        return None
+
+    client = bigquery_storage.BigQueryReadClient(credentials=_credentials())
+
+    registry = _clients()
+    with registry["lock"]:
+        registry["storage_clients"][project_id] = client
+    return client
+
+
+def connection_stats():
+    """
+    Returns how many clients (and storage read clients) this process holds and how
+    many HTTP connections their pools have opened and currently keep idle.
+    """
+    registry = _clients()
+    with registry["lock"]:
+        clients = dict(registry["clients"])
+        storage_clients = len(registry["storage_clients"])
+
+    pools = opened = idle = 0
+    for client in clients.values():
+        for adapter in client._http.adapters.values():
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is None:
+                    continue
+                pools += 1
+                opened += pool.num_connections
+                # Idle connections sit in the pool's queue; empty slots are None
+                idle += sum(conn is not None for conn in list(pool.pool.queue))
+
+    return {"clients": len(clients), "storage_clients": storage_clients, "pools": pools, "connections_opened": opened, "connections_idle": idle}
+
+
+def render_connection_report():
+    # Sidebar panel showing the shared client, its connection pool and query coalescing
+    stats = connection_stats()
+    flights = single_flight.stats()
+    with st.sidebar.expander("🔌 BigQuery Connections"):
+        st.metric("Clients", f"{stats['clients']:,}")
+        st.metric("Storage read clients", f"{stats['storage_clients']:,}")
+        st.metric("Connection pools", f"{stats['pools']:,}")
+        st.metric("Connections opened", f"{stats['connections_opened']:,}")
+        st.metric("Idle connections", f"{stats['connections_idle']:,}")
+        st.metric("Queries run", f"{flights['executed']:,}")
+        st.metric("Duplicate queries coalesced", f"{flights['deduplicated']:,}")
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from data_store import memoize
+
+
+def build_cube(df, date_col, group_col, metrics):
+    """
+    Sums the metrics into dense (day, group) arrays covering every day from the first
+    to the last one in the table, so date ranges are row slices and group selections
+    are column picks.
+
+    Args:
+        df: Table with a datetime64 day column.
+        date_col: Day column.
+        group_col: Column whose values become the cube's groups (rows without one are dropped).
+        metrics: Numeric columns to sum.
+
+    Returns:
+        Dict with 'days' (DatetimeIndex), 'groups' (sorted group names), 'rows' (rows per
+        cell, to tell empty cells from zeros) and 'cells' (metric -> n_days x n_groups array).
+    """
+    valid = df[date_col].notna() & df[group_col].notna()
+    df = df[valid]
+    group_codes, groups = pd.factorize(df[group_col], sort=True)
+    groups = np.asarray(groups, dtype=object)
+
+    if df.empty:
+        days = pd.DatetimeIndex([])
+        day_codes = np.array([], dtype="int64")
+    else:
+        first = df[date_col].min()
+        days = pd.date_range(first, df[date_col].max(), freq="D")
+        day_codes = ((df[date_col] - first) // pd.Timedelta(days=1)).to_numpy(dtype="int64")
+
+    shape = (len(days), len(groups))
+    flat = day_codes * len(groups) + group_codes
+    rows = np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape)
+    cells = {
+        metric: np.bincount(
+            flat, weights=df[metric].to_numpy(dtype="float64", na_value=0), minlength=shape[0] * shape[1]
+        ).reshape(shape)
+        for metric in metrics
+    }
+    return {"days": days, "groups": groups, "rows": rows, "cells": cells}
+
+
+@memoize
+def get_cube(df, date_col, group_col, metrics, filter_on=None, filter_value=None):
+    """
+    Returns the cube for one breakdown of a shared table, building it once per data
+    refresh. filter_on/filter_value restrict it to one slice of a stacked table, e.g.
+    Breakdown == "Age" in ad_demographics.
+    """
+    rows = df[df[filter_on] == filter_value] if filter_on else df
+    return build_cube(rows, date_col, group_col, metrics)
+
+
+def day_range(cube, start_date, end_date):
+    # Row slice for the days in [start_date, end_date] (binary search)
+    lo = cube["days"].searchsorted(pd.Timestamp(start_date), side="left")
+    hi = cube["days"].searchsorted(pd.Timestamp(end_date), side="right")
+    return slice(lo, hi)
+
+
+def groups_in(cube, days):
+    # Groups with at least one row in the day slice
+    return cube["groups"][cube["rows"][days].any(axis=0)].tolist()
+
+
+def group_positions(cube, selected):
+    # Columns of the selected group names
+    return np.flatnonzero(np.isin(cube["groups"], list(selected)))
+
+
+def totals(cube, metric, days, columns=None):
+    # Sum of a metric over a day slice, per group with rows in it (columns=None) or across the given groups
+    block = cube["cells"][metric][days]
+    if columns is None:
+        present = cube["rows"][days].any(axis=0)
+        return pd.Series(block.sum(axis=0)[present], index=cube["groups"][present])
+    return float(block[:, columns].sum())
+
+
+def ratio(numerator, denominator):
+    # Elementwise ratio with 0 where the denominator is 0
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype="float64"), where=denominator != 0)
+
+
+def daily_frame(cube, values, days, columns, group_col):
+    """
+    Long DataFrame of (date, group, value) for the cells in the day slice and columns
+    that had rows, ready for a line chart per group.
+
+    Args:
+        cube: Cube from get_cube.
+        values: n_days x n_groups array to read, e.g. cube["cells"]["spend"] or a ratio of two.
+        days: Day slice from day_range.
+        columns: Group positions from group_positions.
+        group_col: Name for the group column.
+    """
+    present = cube["rows"][days][:, columns] > 0
+    day_idx, col_idx = np.nonzero(present)
+    return pd.DataFrame({
+        "date": cube["days"][days][day_idx],
+        group_col: cube["groups"][columns][col_idx],
+        "value": values[days][:, columns][day_idx, col_idx],
+    })
+
+
+def top_groups(cube, values, days, columns, n):
+    """
+    Splits the selected columns into the n with the largest totals of values over the
+    day slice and the rest.
+
+    Returns:
+        Tuple of (top column positions, best first; remaining positions).
+    """
+    columns = np.asarray(columns, dtype="int64")
+    order = np.argsort(-values[days][:, columns].sum(axis=0), kind="stable")
+    return columns[order[:n]], columns[order[n:]]
+
+
+def fold_groups(cube, keep, rest, label="Other"):
+    """
+    Cube with only the kept columns plus one column summing the rest, so daily_frame,
+    ratio and totals work on it unchanged (a folded ratio is the ratio of folded sums).
+    """
+    groups = cube["groups"][keep]
+    if len(rest):
+        groups = np.append(groups, f"{label} ({len(rest)})")
+
+    def fold(values):
+        kept = [values[:, keep]]
+        return np.column_stack(kept + [values[:, rest].sum(axis=1)]) if len(rest) else kept[0]
+
+    return {
+        "days": cube["days"],
+        "groups": groups,
+        "rows": fold(cube["rows"]),
+        "cells": {metric: fold(cells) for metric, cells in cube["cells"].items()},
+    }
@@ -0,0 +1,90 @@
+import numpy as np
+from scipy import stats
+
+from data_store import memoize
+
+
+def creative_breakdowns(df, group_cols, metric_col="video_photo_reach"):
+    """
+    Average and count of a metric per value of each creative column.
+
+    Returns:
+        Dict of column -> DataFrame with the column, Average_Reach and Post_Count, best average first.
+    """
+    breakdowns = {}
+    for col in group_cols:
+        if col not in df.columns or metric_col not in df.columns:
+            continue
+        breakdowns[col] = (
+            df.groupby(col, observed=True)
+            .agg(Average_Reach=(metric_col, "mean"), Post_Count=(metric_col, "count"))
+            .reset_index()
+            .sort_values("Average_Reach", ascending=False, ignore_index=True)
+        )
+    return breakdowns
+
+
+def fit_lines(df, x_cols, y_col="video_photo_reach", confidence=0.95):
+    """
+    Ordinary least squares of y_col on each x column separately, all in one pass over
+    an n_rows x n_columns matrix. Each fit uses the rows where both values are present.
+
+    Returns:
+        Dict of column -> dict with n, slope, intercept, r2, and slope_ci / intercept_ci
+        as (low, high) tuples (NaN where there are too few points).
+    """
+    x_cols = [col for col in x_cols if col in df.columns]
+    if not x_cols or y_col not in df.columns:
+        return {}
+
+    x = df[x_cols].to_numpy(dtype="float64", na_value=np.nan)
+    y = df[y_col].to_numpy(dtype="float64", na_value=np.nan)[:, None]
+    present = ~np.isnan(x) & ~np.isnan(y)
+    n = present.sum(axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Means and centered sums per column, over that column's complete rows
+        x_mean = np.where(present, x, 0).sum(axis=0) / n
+        y_mean = np.where(present, y, 0).sum(axis=0) / n
+        dx = np.where(present, x - x_mean, 0)
+        dy = np.where(present, y - y_mean, 0)
+        sxx, syy, sxy = (dx * dx).sum(axis=0), (dy * dy).sum(axis=0), (dx * dy).sum(axis=0)
+
+        slope = sxy / sxx
+        intercept = y_mean - slope * x_mean
+        residual = np.maximum(syy - slope * sxy, 0)
+        r2 = 1 - residual / syy
+
+        # Standard errors and Student-t intervals, as statsmodels' OLS reports them
+        dof = n - 2
+        sigma2 = residual / dof
+        se_slope = np.sqrt(sigma2 / sxx)
+        se_intercept = np.sqrt(sigma2 * (1 / n + x_mean ** 2 / sxx))
+        t = np.where(dof > 0, stats.t.ppf((1 + confidence) / 2, np.maximum(dof, 1)), np.nan)
+
+    return {
+        col: {
+            "n": int(n[i]),
+            "slope": slope[i],
+            "intercept": intercept[i],
+            "r2": r2[i],
+            "slope_ci": (slope[i] - t[i] * se_slope[i], slope[i] + t[i] * se_slope[i]),
+            "intercept_ci": (intercept[i] - t[i] * se_intercept[i], intercept[i] + t[i] * se_intercept[i]),
+        }
+        for i, col in enumerate(x_cols)
+    }
+
+
+@memoize
+def get_creative_insights(df, group_cols, x_cols, metric_col="video_photo_reach"):
+    """
+    Every creative breakdown and regression for a shared table, computed together once
+    per data version so switching between them on the page is a dictionary lookup.
+
+    Returns:
+        Dict with 'breakdowns' (see creative_breakdowns) and 'fits' (see fit_lines).
+    """
+    return {
+        "breakdowns": creative_breakdowns(df, group_cols, metric_col),
+        "fits": fit_lines(df, x_cols, metric_col),
+    }
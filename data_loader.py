@@ -0,0 +1,384 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import ingest
+import parquet_cache
+import single_flight
+from data_store import share_tables
+
+
+logger = logging.getLogger(__name__)
+
+# How long a loaded table is served before it is re-synced (override per table with 'ttl')
+DEFAULT_TTL = 60 * 60
+
+
+def build_query(table_ref, columns=None, where=None, date_col=None, start_date=None, end_date=None):
+    """
+    Builds a SELECT that only reads the columns a page uses and, when a date window
+    is given, only the partitions inside it.
+
+    Args:
+        table_ref: Fully qualified table reference (project.dataset.table).
+        columns: Columns to select (default all columns).
+        where: Extra predicate, e.g. the account filter.
+        date_col: DATE or TIMESTAMP column the window applies to.
+        start_date: First day to include (optional).
+        end_date: Last day to include (optional).
+    """
+    select = ", ".join(f"`{col}`" for col in columns) if columns else "*"
+    predicates = [where] if where else []
+
+    # Compare on day boundaries so the same literals work for DATE and TIMESTAMP columns
+    if date_col and start_date is not None:
+        predicates.append(f"`{date_col}` >= '{pd.Timestamp(start_date).date()}'")
+    if date_col and end_date is not None:
+        predicates.append(f"`{date_col}` < '{pd.Timestamp(end_date).date() + timedelta(days=1)}'")
+
+    query = f"SELECT {select} FROM `{table_ref}`"
+    if predicates:
+        query += " WHERE " + " AND ".join(predicates)
+    return query
+
+
+def table_query(spec, start_date=None):
+    # Build the projected query for one entry of a page's TABLES dict
+    return build_query(spec["table_ref"], spec.get("columns"), spec.get("where"), spec.get("date_col"), start_date)
+
+
+def _execute(backend, query):
+    # Execute the query on the configured backend (see backends.py) as an Arrow table
+    return backend.run_arrow(query)
+
+
+def execute_query(backend, query):
+    """
+    Runs a query, sharing the result with any identical query already in flight in
+    this process (see single_flight), so simultaneous cold loads hit the warehouse once.
+    The shared result is an immutable Arrow table; callers convert it with ingest.
+    """
+    return single_flight.do(query, lambda: _execute(backend, query))
+
+
+def _timed_query(backend, name, query):
+    # Run one query on a worker thread and convert it with the table's schema, recording how long it took
+    started = time.perf_counter()
+    data = ingest.to_frame(execute_query(backend, query), name)
+    return data, time.perf_counter() - started
+
+
+def fetch_tables(backend, queries, max_workers=None):
+    """
+    Submits every query at once and gathers the results concurrently, so a cold
+    load takes as long as the slowest query instead of the sum of all of them.
+
+    Args:
+        backend: Backend the queries run on (see backends.py).
+        queries: Dict of table name -> SQL query; the name picks the ingest schema.
+        max_workers: Thread pool size (default one thread per query).
+
+    Returns:
+        Tuple of (dict of table name -> DataFrame or None on error,
+        dict of table name -> seconds from submit to DataFrame).
+    """
+    frames, timings = {}, {}
+    load_start = time.perf_counter()
+
+    # One worker per query submits and waits on its job. Failures go to the server log, and to
+    # the page as well when this runs on the script thread (background refreshes have no page)
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(queries), 1)) as pool:
+        futures = {name: pool.submit(_timed_query, backend, name, query) for name, query in queries.items()}
+        for name, future in futures.items():
+            try:
+                frames[name], timings[name] = future.result()
+            except Exception as e:
+                logger.warning("Could not fetch %s: %s", name, e)
+                if get_script_run_ctx() is not None:
+                    st.error(f"Error fetching data: {e}")
+                frames[name] = None
+
+    for name, seconds in timings.items():
+        logger.info("Loaded %s in %.2fs", name, seconds)
+    logger.info("Loaded %d tables in %.2fs", len(queries), time.perf_counter() - load_start)
+
+    return frames, timings
+
+
+def sync_tables(backend, specs, start_dates=None):
+    """
+    Loads each table from its local Parquet cache and only fetches the rows from the
+    cached watermark onward, so restarts cost the new data instead of the full history.
+
+    Args:
+        backend: Backend the queries run on (see backends.py).
+        specs: Dict of table name -> spec with 'table_ref' and optional 'where',
+            'columns' and 'date_col' (the column new rows are found by).
+        start_dates: Optional dict of table name -> first day the page needs.
+
+    Returns:
+        Tuple of (dict of table name -> DataFrame, dict of table name -> fetch seconds,
+        dict of table name -> cache file mtime for the tables served from the cache
+        because their fetch failed).
+    """
+    start_dates = start_dates or {}
+    paths, cached, covered, fetch_from, queries = {}, {}, {}, {}, {}
+
+    for name, spec in specs.items():
+        date_col = spec.get("date_col")
+        paths[name] = parquet_cache.cache_path(name, table_query(spec))
+        cached[name] = parquet_cache.read_cache(paths[name])
+        window_start = start_dates.get(name)
+        if window_start is not None:
+            window_start = pd.Timestamp(window_start).date()
+
+        since = parquet_cache.sync_start(cached[name], date_col)
+        cache_start = parquet_cache.covered_from(paths[name], cached[name], date_col) if since is not None else None
+        if since is not None and parquet_cache.covers(cache_start, window_start):
+            # Fetch from the cached watermark, but never from before the page's window
+            if window_start is not None:
+                since = max(since, window_start)
+            covered[name] = cache_start
+        else:
+            # No usable cache, or the page now needs days from before the cached ones: fetch the whole window
+            since = covered[name] = window_start
+        fetch_from[name] = since
+        queries[name] = table_query(spec, since)
+
+    frames, timings = fetch_tables(backend, queries)
+
+    tables, fallbacks = {}, {}
+    for name, spec in specs.items():
+        date_col = spec.get("date_col")
+        fresh, old = frames.get(name), cached[name]
+
+        if fresh is None:
+            # Serve whatever is cached when the warehouse call fails, as of when it was cached
+            tables[name] = parquet_cache.trim_window(old, date_col, start_dates.get(name))
+            if old is not None:
+                fallbacks[name] = paths[name].stat().st_mtime
+            continue
+
+        if old is not None and date_col and fetch_from[name] is not None:
+            fresh = parquet_cache.merge_increment(old, fresh, date_col, fetch_from[name])
+            fresh = ingest.conform(fresh, name)
+
+        # The file keeps every synced day, so a wider window later only fetches what it lacks
+        try:
+            parquet_cache.write_cache(paths[name], fresh, covered[name])
+        except Exception as e:
+            logger.warning("Could not write cache for %s: %s", name, e)
+        tables[name] = parquet_cache.trim_window(fresh, date_col, start_dates.get(name))
+
+    return tables, timings, fallbacks
+
+
+@st.cache_resource
+def _loaded_tables():
+    # Tables loaded so far in this process, keyed by (table name, base query)
+    return {"tables": {}, "refreshing": set(), "lock": threading.Lock()}
+
+
+def required_tables(section_tables, sections=None):
+    # Tables needed by the given sections (default all), in first-use order
+    names = []
+    for section, tables in section_tables.items():
+        if sections is None or section in sections:
+            names.extend(name for name in tables if name not in names)
+    return names
+
+
+def _table_key(specs, name):
+    return name, table_query(specs[name])
+
+
+def _store_tables(specs, tables, start_dates, loaded_at):
+    # Swap freshly loaded frames into the registry, each with its load time (table name -> seconds);
+    # readers keep whatever they already hold
+    registry = _loaded_tables()
+    with registry["lock"]:
+        for name, df in tables.items():
+            # Failed loads are not cached, so the next caller retries them
+            if df is not None:
+                registry["tables"][_table_key(specs, name)] = {
+                    "df": df, "start_date": start_dates.get(name), "loaded_at": loaded_at[name],
+                }
+
+
+def _normalized(specs, tables):
+    # Canonical date and hashtag columns, added once per refresh (see ingest.py)
+    return {
+        name: ingest.parse_hashtags(ingest.normalize_dates(df, specs[name].get("date_col")))
+        for name, df in tables.items()
+    }
+
+
+def _versions(specs, tables, synced_at):
+    # Version token per loaded table (synced_at: table name -> seconds); the base query identifies
+    # the source (same table, columns and filter)
+    return {
+        name: ingest.version_token(df, table_query(specs[name]), specs[name].get("date_col"), synced_at[name])
+        for name, df in tables.items()
+        if df is not None
+    }
+
+
+def _queries(specs, tables):
+    # Base query per table, keying the shared store like _table_key
+    return {name: table_query(specs[name]) for name in tables}
+
+
+def _load_tables(backend, specs, names, start_dates):
+    # Sync the named tables together and publish them to the registry
+    started = time.time()
+    loaded, _, fallbacks = sync_tables(
+        backend,
+        {name: specs[name] for name in names},
+        {name: start_dates[name] for name in names if start_dates.get(name) is not None},
+    )
+
+    # A table served from the cache after a failed fetch is as old as the copy it came from: the one
+    # already in the registry, or else the cache file. It stays stale, so the next check retries it.
+    registry = _loaded_tables()
+    with registry["lock"]:
+        previous = {name: registry["tables"].get(_table_key(specs, name)) for name in fallbacks}
+    loaded_at = {
+        name: previous[name]["loaded_at"] if previous.get(name) else fallbacks.get(name, started)
+        for name in loaded
+    }
+
+    tables = _normalized(specs, loaded)
+    shared = share_tables(tables, _versions(specs, tables, loaded_at), _queries(specs, tables))
+    _store_tables(specs, shared, start_dates, loaded_at)
+
+
+def _read_disk_tables(specs, names, start_dates):
+    # Last synced copies from the Parquet cache, stamped with when they were written; a copy
+    # that starts after the page's window is skipped, so the table is loaded instead
+    for name in names:
+        date_col = specs[name].get("date_col")
+        path = parquet_cache.cache_path(name, table_query(specs[name]))
+        df = parquet_cache.read_cache(path)
+        if df is None or not parquet_cache.covers(parquet_cache.covered_from(path, df, date_col), start_dates.get(name)):
+            continue
+        df = parquet_cache.trim_window(df, date_col, start_dates.get(name))
+        tables, written_at = _normalized(specs, {name: df}), {name: path.stat().st_mtime}
+        shared = share_tables(tables, _versions(specs, tables, written_at), _queries(specs, tables))
+        _store_tables(specs, shared, start_dates, written_at)
+
+
+def _refresh_in_background(backend, specs, names, start_dates):
+    registry = _loaded_tables()
+    with registry["lock"]:
+        # Only one refresh per table at a time
+        names = [name for name in names if _table_key(specs, name) not in registry["refreshing"]]
+        registry["refreshing"].update(_table_key(specs, name) for name in names)
+    if not names:
+        return
+
+    def refresh():
+        try:
+            _load_tables(backend, specs, names, start_dates)
+        except Exception as e:
+            logger.warning("Background refresh of %s failed: %s", ", ".join(names), e)
+        finally:
+            with registry["lock"]:
+                registry["refreshing"].difference_update(_table_key(specs, name) for name in names)
+
+    threading.Thread(target=refresh, name="table-refresh", daemon=True).start()
+
+
+def get_tables(backend, specs, names, start_dates=None, stale_while_revalidate=True):
+    """
+    Returns the named tables, loading a table the first time anything asks for it and
+    serving it from the process-wide cache afterwards. A table goes stale on its own
+    once its 'ttl' runs out or it is invalidated (see invalidate_cache.py).
+
+    In stale-while-revalidate mode stale tables are returned straight away and
+    re-synced on a background thread, which swaps the new frames in when done. After
+    a restart the last on-disk copy is served the same way, so only a table that has
+    never been synced makes the viewer wait on the warehouse.
+
+    Args:
+        backend: Backend the queries run on (see backends.py).
+        specs: The page's TABLES dict.
+        names: Table names the caller needs.
+        start_dates: Optional dict of table name -> first day the page needs.
+        stale_while_revalidate: Serve stale tables and refresh them in the background
+            (default True); when False, stale tables are reloaded before returning.
+
+    Returns:
+        Dict of table name -> shared DataFrame (None if it could not be loaded).
+    """
+    start_dates = start_dates or {}
+    registry = _loaded_tables()
+
+    def is_fresh(name, entry, now):
+        # Loaded for the same date window, within its TTL and not invalidated since
+        if entry["start_date"] != start_dates.get(name):
+            return False
+        if now - entry["loaded_at"] >= specs[name].get("ttl", DEFAULT_TTL):
+            return False
+        return parquet_cache.invalidated_at(name) < entry["loaded_at"]
+
+    def check(wanted):
+        missing, stale = [], []
+        with registry["lock"]:
+            now = time.time()
+            for name in wanted:
+                entry = registry["tables"].get(_table_key(specs, name))
+                if entry is None:
+                    missing.append(name)
+                elif not is_fresh(name, entry, now):
+                    stale.append(name)
+        return missing, stale
+
+    missing, stale = check(list(dict.fromkeys(names)))
+
+    if stale_while_revalidate:
+        if missing:
+            _read_disk_tables(specs, missing, start_dates)
+            missing, stale = check(list(dict.fromkeys(names)))
+        if stale:
+            _refresh_in_background(backend, specs, stale, start_dates)
+    else:
+        missing += stale
+
+    if missing:
+        # Nothing to serve yet, so these have to be waited on
+        _load_tables(backend, specs, missing, start_dates)
+
+    with registry["lock"]:
+        entries = {name: registry["tables"].get(_table_key(specs, name)) for name in names}
+    return {name: entry["df"] if entry else None for name, entry in entries.items()}
+
+
+def data_status(specs, names):
+    """
+    Returns how old the oldest of the named tables is (seconds, None if none are
+    loaded) and whether any of them is being refreshed in the background.
+    """
+    registry = _loaded_tables()
+    with registry["lock"]:
+        keys = [_table_key(specs, name) for name in names]
+        loaded = [registry["tables"][key]["loaded_at"] for key in keys if key in registry["tables"]]
+        refreshing = any(key in registry["refreshing"] for key in keys)
+    age = time.time() - min(loaded) if loaded else None
+    return {"age": age, "refreshing": refreshing}
+
+
+def render_data_status(specs, names):
+    # Caption telling viewers how old the numbers on the page are
+    status = data_status(specs, names)
+    if status["age"] is None:
+        return
+    minutes = int(status["age"] // 60)
+    age_text = "just now" if minutes < 1 else f"{minutes} min ago" if minutes < 120 else f"{minutes // 60} h ago"
+    refreshing_text = " · refreshing in the background…" if status["refreshing"] else ""
+    st.caption(f"🕒 Data updated {age_text}{refreshing_text}")
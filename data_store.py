@@ -0,0 +1,203 @@
+import functools
+import itertools
+import os
+import threading
+import time
+import weakref
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+
+# Sessions seen within this many seconds count as active in the memory report
+SESSION_TIMEOUT = 15 * 60
+
+
+@st.cache_resource
+def _registry():
+    # Process-wide bookkeeping shared by every session
+    return {
+        "tables": {}, "sessions": {}, "derived": {}, "versions": itertools.count(1),
+        "baseline_rss": None, "lock": threading.Lock(),
+    }
+
+
+def to_arrow_strings(df):
+    # Move plain-string object columns to Arrow storage (compact, no per-value Python objects)
+    string_cols = [
+        col for col in df.columns
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) == "string"
+    ]
+    if not string_cols:
+        return df
+    return df.astype({col: "string[pyarrow]" for col in string_cols})
+
+
+def share_tables(tables, versions=None, queries=None):
+    """
+    Prepares freshly loaded tables for the process-wide cache. String columns move to
+    Arrow storage and every frame is registered for the memory report, along with its
+    version token. Pages receive these exact objects, so they must treat them as read-only.
+
+    Each page script turns on pandas copy-on-write for that: column selections and slices
+    of a shared table then share its memory until written to, so a page can never modify
+    what other sessions see (boolean-mask filters still copy the rows they keep). It is set
+    by the pages rather than on import, so library code doesn't change pandas globally.
+
+    Args:
+        tables: Dict of table name -> DataFrame (or None on a failed load).
+        versions: Optional dict of table name -> version token (see ingest.version_token).
+        queries: Optional dict of table name -> base query, so pages loading the same
+            table with different columns are reported separately.
+
+    Returns:
+        Dict of table name -> shared DataFrame.
+    """
+    versions, queries = versions or {}, queries or {}
+    shared = {name: to_arrow_strings(df) if df is not None else None for name, df in tables.items()}
+    registry = _registry()
+    with registry["lock"]:
+        registry["tables"].update({
+            (name, queries.get(name)): df for name, df in shared.items() if df is not None
+        })
+    for name, df in shared.items():
+        if df is not None and name in versions:
+            derived(df, ("version",), lambda token=versions[name]: token)
+    return shared
+
+
+def derived(df, key, build):
+    """
+    Returns build(df), computed once per shared frame and key and reused by every
+    session. An entry lives as long as its frame, so a refreshed table starts over.
+
+    Args:
+        df: Shared table the structure is derived from.
+        key: Hashable description of what is built, e.g. ("daily_index", "date", metrics).
+        build: Zero-argument callable building the structure.
+    """
+    registry = _registry()
+    entry_key = (id(df), key)
+    with registry["lock"]:
+        entry = registry["derived"].get(entry_key)
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+
+    value = build()
+    with registry["lock"]:
+        registry["derived"][entry_key] = (weakref.ref(df), value)
+    weakref.finalize(df, registry["derived"].pop, entry_key, None)
+    return value
+
+
+def frame_version(df):
+    # Version token of a shared frame (set by share_tables); other frames get a number of their own
+    registry = _registry()
+    return derived(df, ("version",), lambda: next(registry["versions"]))
+
+
+def _memo_key(value):
+    # Frames are keyed by version, never hashed; lists become tuples
+    if isinstance(value, pd.DataFrame):
+        return "frame", frame_version(value)
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def memoize(func):
+    """
+    Decorator caching func's result per version of its DataFrame arguments and value
+    of the others (which must be hashable, lists aside). Unlike st.cache_data it never
+    hashes a frame, so a hit costs a few dictionary lookups. Results are shared by every
+    session and live as long as the first DataFrame argument.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        frames = [value for value in (*args, *kwargs.values()) if isinstance(value, pd.DataFrame)]
+        if not frames:
+            return func(*args, **kwargs)
+        key = (
+            "memoize", func.__module__, func.__qualname__,
+            tuple(_memo_key(value) for value in args),
+            tuple(sorted((name, _memo_key(value)) for name, value in kwargs.items())),
+        )
+        return derived(frames[0], key, lambda: func(*args, **kwargs))
+
+    return wrapper
+
+
+def track_session():
+    # Remember that this session is alive, for the per-session memory estimate
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    registry = _registry()
+    with registry["lock"]:
+        # The first session records the baseline: the interpreter and libraries, before any table is loaded
+        if registry["baseline_rss"] is None and not registry["tables"]:
+            registry["baseline_rss"] = process_rss()
+        registry["sessions"][ctx.session_id] = time.time()
+
+
+def process_rss():
+    # Resident memory of this process in bytes (Linux), or None when unavailable
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def memory_report():
+    """
+    Returns the shared bytes per table along with the process RSS, the baseline RSS
+    before any table was loaded and an estimate of how much each active session adds
+    on top of the baseline and the shared store. Libraries first imported during a run
+    and process-wide caches (indexes, figures) still count towards the estimate.
+    """
+    registry = _registry()
+    now = time.time()
+    with registry["lock"]:
+        tables = dict(registry["tables"])
+        sessions = {sid: seen for sid, seen in registry["sessions"].items() if now - seen < SESSION_TIMEOUT}
+        registry["sessions"] = sessions
+        baseline = registry["baseline_rss"]
+
+    # One row per table and query; a table loaded by several queries is numbered after the first
+    seen = {}
+    table_bytes = {}
+    for (name, _), df in tables.items():
+        seen[name] = seen.get(name, 0) + 1
+        label = name if seen[name] == 1 else f"{name} [{seen[name]}]"
+        table_bytes[label] = int(df.memory_usage(deep=True).sum())
+    table_bytes = pd.Series(table_bytes, dtype="int64").sort_values(ascending=False)
+    shared_bytes = int(table_bytes.sum())
+    rss = process_rss()
+    active_sessions = len(sessions)
+    per_session = None
+    if rss and baseline and active_sessions:
+        per_session = max(rss - baseline - shared_bytes, 0) / active_sessions
+
+    return {
+        "table_bytes": table_bytes,
+        "shared_bytes": shared_bytes,
+        "rss_bytes": rss,
+        "baseline_bytes": baseline,
+        "active_sessions": active_sessions,
+        "per_session_bytes": per_session,
+    }
+
+
+def render_memory_report():
+    # Sidebar panel showing shared vs per-session memory
+    report = memory_report()
+    with st.sidebar.expander("💾 Memory"):
+        st.metric("Shared tables", f"{report['shared_bytes'] / 1e6:,.1f} MB")
+        st.metric("Process RSS", f"{report['rss_bytes'] / 1e6:,.1f} MB" if report["rss_bytes"] else "N/A")
+        st.metric("Baseline RSS", f"{report['baseline_bytes'] / 1e6:,.1f} MB" if report["baseline_bytes"] else "N/A")
+        st.metric("Active sessions", f"{report['active_sessions']:,}")
+        per_session = report["per_session_bytes"]
+        st.metric("Per session (est.)", f"{per_session / 1e6:,.1f} MB" if per_session is not None else "N/A")
+        st.dataframe((report["table_bytes"] / 1e6).round(2).rename("MB"))
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+# Points per chart: a little over a full-width chart's pixel width, shared across its series
+MAX_POINTS = 1500
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-triangle-three-buckets: picks n_out of the points (always the first and the
+    last) that keep the visual shape of the line, one per bucket of the x-sorted input.
+
+    Args:
+        x: Sorted numeric (or datetime64) x values.
+        y: Values at x.
+        n_out: Number of points to keep.
+
+    Returns:
+        Sorted positions of the kept points (every position when n_out covers them all).
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype("int64")
+    x = x.astype("float64")
+    y = np.asarray(y, dtype="float64")
+
+    # n_out - 2 interior buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype("int64")
+    keep = np.empty(n_out, dtype="int64")
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Third corner: the mean of the next bucket (the last point for the final bucket)
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.nanargmax(area)) if not np.isnan(area).all() else lo
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(df, x_col, y_col, group_col=None, max_points=MAX_POINTS):
+    """
+    Cuts a long-format line chart's data down to max_points, split evenly across the
+    series (one per group_col value), with LTTB inside each series.
+
+    Args:
+        df: Rows sorted by x_col within each series.
+        x_col: X column.
+        y_col: Value column.
+        group_col: Series column, or None for a single line.
+        max_points: Point budget for the whole chart.
+    """
+    if len(df) <= max_points:
+        return df
+    x = df[x_col].to_numpy()
+    y = df[y_col].to_numpy(dtype="float64", na_value=np.nan)
+    if group_col is None:
+        return df.iloc[lttb(x, y, max_points)]
+
+    series = df.groupby(group_col, sort=False, observed=True).indices
+    budget = max(max_points // len(series), 3)
+    positions = np.concatenate([
+        rows[lttb(x[rows], y[rows], budget)]
+        for rows in series.values()
+    ])
+    return df.iloc[np.sort(positions)]
@@ -0,0 +1,87 @@
+"""
+Process-wide cache of rendered plotly figures.
+
+A figure is stored as its JSON, keyed on the section drawing it, the data version of
+every table it is drawn from (data_store.frame_version) and the widget values that
+shape it. Toggling back to a view any session has already seen skips both the pandas
+work and the figure construction. Entries are evicted least recently used first once
+the cache holds more than FIGURE_CACHE_MB of JSON.
+"""
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+from data_store import frame_version
+
+
+FIGURE_CACHE_BYTES = int(float(os.environ.get("FIGURE_CACHE_MB", "64")) * 1e6)
+
+
+@st.cache_resource
+def _cache():
+    return {"figures": OrderedDict(), "bytes": 0, "hits": 0, "misses": 0, "lock": threading.Lock()}
+
+
+def cached_figure(section, sources, params, build):
+    """
+    Returns the figure for a section, building it only when this combination of data
+    versions and widget values has not been drawn yet (or was evicted).
+
+    Args:
+        section: Name of the chart, unique per page.
+        sources: Shared tables the figure is drawn from.
+        params: Hashable widget values and other inputs that change the figure.
+        build: Zero-argument callable returning a plotly Figure.
+    """
+    cache = _cache()
+    key = (section, tuple(frame_version(df) for df in sources), params)
+    with cache["lock"]:
+        spec = cache["figures"].get(key)
+        if spec is not None:
+            cache["figures"].move_to_end(key)
+            cache["hits"] += 1
+        else:
+            cache["misses"] += 1
+    if spec is not None:
+        # The JSON came from a validated figure, so it can skip plotly's validators
+        return go.Figure(json.loads(spec), _validate=False)
+
+    fig = build()
+    spec = pio.to_json(fig, validate=False)
+    size = sys.getsizeof(spec)
+    with cache["lock"]:
+        if key not in cache["figures"] and size <= FIGURE_CACHE_BYTES:
+            cache["figures"][key] = spec
+            cache["bytes"] += size
+        while cache["bytes"] > FIGURE_CACHE_BYTES:
+            _, evicted = cache["figures"].popitem(last=False)
+            cache["bytes"] -= sys.getsizeof(evicted)
+    return fig
+
+
+def figure_cache_stats():
+    # Entries, bytes held and hit/miss counts since the process started
+    cache = _cache()
+    with cache["lock"]:
+        return {
+            "entries": len(cache["figures"]),
+            "bytes": cache["bytes"],
+            "hits": cache["hits"],
+            "misses": cache["misses"],
+        }
+
+
+def render_figure_cache_report():
+    # Sidebar panel showing the figure cache
+    stats = figure_cache_stats()
+    with st.sidebar.expander("🖼️ Figure Cache"):
+        st.metric("Figures cached", f"{stats['entries']:,}")
+        st.metric("Size", f"{stats['bytes'] / 1e6:,.1f} MB of {FIGURE_CACHE_BYTES / 1e6:,.0f} MB")
+        lookups = stats["hits"] + stats["misses"]
+        st.metric("Hit rate", f"{stats['hits'] / lookups:.0%}" if lookups else "N/A")
@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from data_store import derived
+
+
+# Filtered views whose stats are kept per source table, least recently used dropped first
+MAX_CACHED_VIEWS = 32
+
+
+def explode_hashtags(df, hashtag_col="hashtags"):
+    """
+    Flattens the hashtag list column into one entry per (post, tag) without touching
+    Python objects.
+
+    Returns:
+        Tuple of (categorical Series of tags, array of the row position each came from).
+    """
+    tags = pa.array(df[hashtag_col])
+    if isinstance(tags, pa.ChunkedArray):
+        tags = tags.combine_chunks()
+    parents = pc.list_parent_indices(tags).to_numpy()
+    flat = pc.list_flatten(tags).dictionary_encode().to_pandas()
+    return flat, parents
+
+
+def compute_hashtag_performance(df, hashtag_col="hashtags", metric_col="reach"):
+    """
+    Count, mean, median and total of a metric per hashtag, over the posts that have a
+    value for it, in one groupby.
+
+    Args:
+        df: Posts with a hashtag list column (see ingest.parse_hashtags).
+        hashtag_col: List column of tags.
+        metric_col: Numeric column to aggregate, e.g. video_photo_reach or like_count.
+
+    Returns:
+        DataFrame with hashtag, count, avg_, median_ and total_<metric_col>, best average first.
+    """
+    columns = ["hashtag", "count", f"avg_{metric_col}", f"median_{metric_col}", f"total_{metric_col}"]
+    if df.empty or hashtag_col not in df.columns or metric_col not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    tags, parents = explode_hashtags(df, hashtag_col)
+    values = df[metric_col].to_numpy(dtype="float64", na_value=np.nan)[parents]
+    exploded = pd.DataFrame({"hashtag": tags, "value": values}).dropna(subset=["value"])
+
+    result = (
+        exploded.groupby("hashtag", observed=True)["value"]
+        .agg(["count", "mean", "median", "sum"])
+        .reset_index()
+    )
+    result.columns = columns
+    result["hashtag"] = result["hashtag"].astype(str)
+    return result.sort_values(f"avg_{metric_col}", ascending=False, ignore_index=True)
+
+
+def get_hashtag_performance(source, view, metric_col, view_key=(), hashtag_col="hashtags"):
+    """
+    compute_hashtag_performance for a filtered view of a shared table, cached per data
+    version of the table and view_key (the filters that produced the view). Only the
+    MAX_CACHED_VIEWS most recently used views are kept, since every caption query and
+    date range is a new one.
+
+    Args:
+        source: Shared table the view was filtered from.
+        view: The filtered posts to aggregate.
+        metric_col: Numeric column to aggregate.
+        view_key: Hashable description of the view's filters.
+        hashtag_col: List column of tags.
+    """
+    cache = derived(source, ("hashtag_performance",), lambda: {"views": OrderedDict(), "lock": threading.Lock()})
+    key = (hashtag_col, metric_col, view_key)
+    with cache["lock"]:
+        stats = cache["views"].get(key)
+        if stats is not None:
+            cache["views"].move_to_end(key)
+            return stats
+
+    stats = compute_hashtag_performance(view, hashtag_col, metric_col)
+    with cache["lock"]:
+        cache["views"][key] = stats
+        while len(cache["views"]) > MAX_CACHED_VIEWS:
+            cache["views"].popitem(last=False)
+    return stats
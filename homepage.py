@@ -1,14 +1,29 @@
 import streamlit as st
 import pandas as pd
-from google.cloud import bigquery  # If you're using BigQuery
 import requests  # If you're calling the Graph API directly
 import json
-from google.oauth2 import service_account
 import matplotlib.pyplot as plt
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from backends import get_backend
+from bq_client import render_connection_report
+from data_loader import get_tables, render_data_status, required_tables
+from data_store import render_memory_report, track_session
+from downsample import downsample
+from figure_cache import cached_figure, render_figure_cache_report
+from metrics import (
+    AD_SCORECARD_METRICS, POST_SCORECARD_METRICS, ad_scorecards, daily_ad_summary, demographic_spend,
+    follower_growth, metric_card, organic_scorecards,
+)
+from rollups import rollup_ref
+from sparklines import sparkline_svg
+from sections import render_timing_report, section, start_page
+from timeseries import get_index
+
 
+# Shared tables are read-only; copy-on-write keeps them that way (see data_store.share_tables)
+pd.set_option("mode.copy_on_write", True)
 
 # Set page components
 st.set_page_config(page_title="SP Bizz Overview", layout="wide", page_icon="📊")
@@ -30,218 +45,161 @@ PROJECT_ID = "bizbuddydemo-v3"
 FB_PAGE_ID = 12101296
 IG_USER_ID = 17841400708882174
 
-# Load credentials and project ID from st.secrets
-credentials = service_account.Credentials.from_service_account_info(
-    st.secrets["gcp_service_account"]
-)
+# Shared warehouse backend (BigQuery, or local fixtures with DATA_BACKEND=local)
+backend = get_backend(PROJECT_ID)
+
+# Account filters for each source
+AD_ACCOUNT_FILTER = f"account_id = {FB_PAGE_ID}"
+IG_USER_FILTER = f"user_id = {IG_USER_ID}"
+IG_ACCOUNT_FILTER = f"id = {IG_USER_ID}"
+
+# Instagram insights sync more often than the ad tables, so re-sync them sooner
+IG_TTL = 30 * 60
+
+# Tables this page reads, the columns it needs, and the date column used for
+# date windows and incremental cache syncs
+TABLES = {
+    # Daily sums of facebook_ads.basic_ad from the warehouse rollups (see rollups.py)
+    "daily_ad": {
+        "table_ref": rollup_ref(PROJECT_ID, "daily_ad"),
+        "where": AD_ACCOUNT_FILTER,
+        "columns": ["date", "spend", "impressions", "inline_link_clicks"],
+        "date_col": "date",
+    },
+    "daily_demographics": {
+        "table_ref": rollup_ref(PROJECT_ID, "daily_demographics"),
+        "where": AD_ACCOUNT_FILTER,
+        "columns": ["date", "Breakdown", "Group", "spend"],
+        "date_col": "date",
+    },
+    "instagram_business__posts": {
+        "table_ref": f"{PROJECT_ID}.instagram_business_instagram_business.instagram_business__posts",
+        "where": IG_USER_FILTER,
+        "columns": ["created_timestamp", "post_id", "is_story", "like_count", "comments_count", "video_photo_saved"],
+        "date_col": "created_timestamp",
+        "ttl": IG_TTL,
+    },
+    "user_insights": {
+        "table_ref": f"{PROJECT_ID}.instagram_business.user_insights",
+        "where": IG_ACCOUNT_FILTER,
+        "columns": ["date", "reach", "follower_count"],
+        "date_col": "date",
+        "ttl": IG_TTL,
+    },
+}
+
+# Scorecards compare the last N days with the N before that
+WINDOW_OPTIONS = {"7 days": 7, "30 days": 30, "90 days": 90}
+DEFAULT_WINDOW = "30 days"
+LOOKBACK_DAYS = 2 * max(WINDOW_OPTIONS.values())
+WINDOWED_TABLES = ["daily_ad", "instagram_business__posts"]
+
+# Tables each section of the page reads; anything not listed here is never fetched
+SECTION_TABLES = {
+    "ad_scorecards": ["daily_ad"],
+    "organic_scorecards": ["instagram_business__posts"],
+    "spend_chart": ["daily_ad"],
+    "demographics": ["daily_demographics"],
+    "organic_performance": ["user_insights", "instagram_business__posts"],
+    "follower_growth": ["user_insights"],
+}
+
+def get_data(names, start_date=None):
+    # Fetch tables the first time a section asks for them; later calls read the shared cache
+    return get_tables(backend, TABLES, names, dict.fromkeys(WINDOWED_TABLES, start_date))
 
-# Initialize BigQuery client
-client = bigquery.Client(credentials=credentials, project=PROJECT_ID)
-
-# Basic Ad Data
-def pull_ad_data(dataset_id, table_id):
-    # Build the table reference
-    table_ref = f"{PROJECT_ID}.{dataset_id}.{table_id}"
-    # Query to fetch all data from the table
-    query = f"SELECT * FROM `{table_ref}` WHERE account_id = {FB_PAGE_ID}"
-    try:
-        # Execute the query
-        query_job = client.query(query)
-        result = query_job.result()
-        # Convert the result to a DataFrame
-        data = result.to_dataframe()
-        return data
-    except Exception as e:
-        st.error(f"Error fetching data: {e}")
-        return None
-
-@st.cache_data
-def pull_ig_insights(dataset_id, table_id):
-    # Build the table reference
-    table_ref = f"{PROJECT_ID}.{dataset_id}.{table_id}"
-    # Query to fetch all data from the table
-    query = f"SELECT * FROM `{table_ref}` WHERE user_id = {IG_USER_ID}"
-    try:
-        # Execute the query
-        query_job = client.query(query)
-        result = query_job.result()
-        # Convert the result to a DataFrame
-        data = result.to_dataframe()
-        return data
-    except Exception as e:
-        st.error(f"Error fetching data: {e}")
-        return None
-
-@st.cache_data
-def pull_ig_account_insights(dataset_id, table_id):
-    # Build the table reference
-    table_ref = f"{PROJECT_ID}.{dataset_id}.{table_id}"
-    # Query to fetch all data from the table
-    query = f"SELECT * FROM `{table_ref}` WHERE id = {IG_USER_ID}"
-    try:
-        # Execute the query
-        query_job = client.query(query)
-        result = query_job.result()
-        # Convert the result to a DataFrame
-        data = result.to_dataframe()
-        return data
-    except Exception as e:
-        st.error(f"Error fetching data: {e}")
-        return None
-
-@st.cache_data
-def pull_post_analysis(dataset_id, table_id):
-    # Build the table reference
-    table_ref = f"{PROJECT_ID}.{dataset_id}.{table_id}"
-    # Query to fetch all data from the table
-    query = f"SELECT * FROM `{table_ref}`"
-    try:
-        # Execute the query
-        query_job = client.query(query)
-        result = query_job.result()
-        # Convert the result to a DataFrame
-        data = result.to_dataframe()
-        return data
-    except Exception as e:
-        st.error(f"Error fetching data: {e}")
-        return None
-
-@st.cache_data
-def get_data():
-    #Get basic ads
-    ad_dataset_id = "facebook_ads"
-    ad_table_id = "basic_ad"
-    basic_ad_df = pull_ad_data(ad_dataset_id, ad_table_id)
-
-    #Get ad set
-    adset_dataset_id = "facebook_ads"
-    adset_table_id = "basic_ad_set"
-    basic_adset_df = pull_ad_data(adset_dataset_id, adset_table_id)
-
-    #Get ad set
-    campaign_dataset_id = "facebook_ads"
-    campaign_table_id = "basic_campaign"
-    basic_campaign_df = pull_ad_data(campaign_dataset_id, campaign_table_id)
-
-    #Get demo set
-    demo_dataset_id = "client"
-    demo_table_id = "ad_demographics"
-    basic_demo_df = pull_ad_data(demo_dataset_id, demo_table_id)
-
-    #Get ig posts
-    ig_dataset_id = "instagram_business_instagram_business"
-    ig_table_id = "instagram_business__posts"
-    basic_ig_df = pull_ig_insights(ig_dataset_id, ig_table_id)
-
-    #Get ig posts
-    ig_account_dataset_id = "instagram_business"
-    ig_account_table_id = "user_insights"
-    ig_account_df = pull_ig_account_insights(ig_account_dataset_id, ig_account_table_id)
-
-    #Get analyzed posts
-    client_dataset_id = "client"
-    client_table_id = "sp_analyzed_posts"
-    pa_df = pull_post_analysis(client_dataset_id, client_table_id)
-
-    #return all dfs
-    return basic_ad_df, basic_adset_df, basic_campaign_df, basic_demo_df, basic_ig_df, ig_account_df, pa_df
-
-
-def draw_metric_card_from_df(df, metric_col, label, color="green", days=30):
+def draw_metric_card_from_df(df, metric_col, label, color="green", days=30, date_col="date"):
     """
-    Draws a Streamlit metric card with a sparkline and 30-day period-over-period delta.
+    Draws a Streamlit metric card with a sparkline and period-over-period delta, both
+    read from the table's daily index (see timeseries.py).
 
     Args:
-        df: DataFrame with 'date' column and the metric.
+        df: DataFrame with a datetime64 day column and the metric.
         metric_col: Column name to use for the metric.
         label: Metric label to display.
-        color: Sparkline color.
+        color: Color of the delta text.
         days: Number of days per period (default 30).
+        date_col: Day column to bucket on (default 'date').
     """
-    df = df.copy()
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date')
-
-    # Get today and two time windows
-    today = df['date'].max()
-    start_current = today - timedelta(days=days)
-    start_previous = start_current - timedelta(days=days)
-
-    # Filter for current and previous periods
-    current_period = df[(df['date'] > start_current) & (df['date'] <= today)]
-    previous_period = df[(df['date'] > start_previous) & (df['date'] <= start_current)]
-
-    # Calculate sums or averages
-    current_value = current_period[metric_col].sum()
-    previous_value = previous_period[metric_col].sum()
-
-    # Handle divide-by-zero case
-    if previous_value == 0:
-        delta_pct = 0
-    else:
-        delta_pct = ((current_value - previous_value) / previous_value) * 100
-
-    delta_text = f"{delta_pct:+.1f}%"
-    # Build sparkline from daily values over current period
-    spark_data = (
-        current_period
-        .groupby('date')[metric_col]
-        .sum()
-        .sort_index()
+    # Value, delta and sparkline from one read of the index, periods ending with the latest day in the data
+    card = metric_card(get_index(df, date_col, [metric_col]), metric_col, days)
+    delta_text = f"{card['delta']:+.1f}%"
+
+    # Draw card: text and an inline SVG sparkline in one element, no plotly figure
+    sparkline = sparkline_svg(card["daily"].index, card["daily"].to_numpy(), color="blue", height=60)
+    st.markdown(
+        f"<div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 1rem'>"
+        f"<div style='flex: 1'><strong>{label}</strong>"
+        f"<h3 style='margin-bottom: 0'>{int(card['current']):,}</h3>"
+        f"<span style='color: {color};'>{delta_text}</span></div>"
+        f"<div style='flex: 2'>{sparkline}</div></div>",
+        unsafe_allow_html=True,
     )
 
-    # Draw card
-    col1, col2 = st.columns([1, 2])
 
-    with col1:
-        st.markdown(f"**{label}**")
-        st.markdown(f"<h3 style='margin-bottom: 0'>{int(current_value):,}</h3>", unsafe_allow_html=True)
-        st.markdown(f"<span style='color: {color};'>{delta_text}</span>", unsafe_allow_html=True)
+@section("Demographic pie")
+def draw_demographic_pie(basic_demo_df):
+    # Fragment: changing the breakdown reruns only this pie
+    st.subheader("Pie Chart: Demographic Breakdown")
 
-    with col2:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=spark_data.index,
-            y=spark_data.values,
-            mode='lines',
-            line=dict(color="blue", width=2),
-            showlegend=False
-        ))
-        fig.update_layout(
-            height=60,
-            margin=dict(l=0, r=0, t=0, b=0),
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False),
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
+    # Step 1: Let user choose Breakdown (dimension)
+    breakdown_options = basic_demo_df['Breakdown'].unique().tolist()
+    selected_breakdown = st.selectbox("Break down spend by:", breakdown_options)
+
+    # Step 2: Spend per group of the breakdown, summed and drawn once per data refresh
+    def build_pie():
+        demo_summary = demographic_spend(basic_demo_df, selected_breakdown)
+
+        # Step 3: Plot
+        fig2 = px.pie(
+            demo_summary,
+            names='Category',
+            values='Value',
+            height=500,
+            template='plotly_white',
+            title=f"Spend by {selected_breakdown}"
         )
-        st.plotly_chart(fig, use_container_width=True, key=f"{label}_sparkline")
+        fig2.update_traces(textinfo='percent+label')
+        fig2.update_traces(textinfo='none')  # disables labels on the pie slices
+        return fig2
+
+    fig2 = cached_figure("demographic_pie", [basic_demo_df], (selected_breakdown,), build_pie)
+    st.plotly_chart(fig2, use_container_width=True)
 
 
 # Main Streamlit app
 def main():
 
+    start_page()
     st.title("Stay Pineapple Social Performance Dash")
-
-    # Get data
-    basic_ad_df, basic_adset_df, basic_campaign_df, basic_demo_df, basic_ig_df, ig_account_df, pa_df = get_data()
+    track_session()
 
     # Normalize today and define time periods
     today = pd.to_datetime("today").normalize()
-    last_30_days = (today - timedelta(days=30)).date()
-    prev_30_days = (today - timedelta(days=60)).date()
 
-    # Convert and filter ad data
-    basic_ad_df['date'] = pd.to_datetime(basic_ad_df['date']).dt.date
-    prev_ad_df = basic_ad_df.copy()
-    basic_ad_df = basic_ad_df[basic_ad_df["date"] >= last_30_days]
-    ad_previous = prev_ad_df[(prev_ad_df["date"] < last_30_days) & (prev_ad_df["date"] >= prev_30_days)]
-
-    # Convert and filter IG data
-    basic_ig_df['date'] = pd.to_datetime(basic_ig_df['created_timestamp']).dt.date
-    prev_ig_df = basic_ig_df.copy()
-    basic_ig_df = basic_ig_df[basic_ig_df["date"] >= last_30_days]
-    ig_previous = prev_ig_df[(prev_ig_df["date"] < last_30_days) & (prev_ig_df["date"] >= prev_30_days)]
+    # Get data, only reading back as far as the previous period
+    # Every section renders on each run, so pull all of their tables in one go
+    tables = get_data(required_tables(SECTION_TABLES), (today - timedelta(days=LOOKBACK_DAYS)).date())
+    basic_ad_df = tables["daily_ad"]
+    basic_demo_df = tables["daily_demographics"]
+    basic_ig_df = tables["instagram_business__posts"]
+    ig_account_df = tables["user_insights"]
+    render_data_status(TABLES, tables.keys())
+
+    window_label = st.selectbox(
+        "Compare periods of:", list(WINDOW_OPTIONS.keys()), index=list(WINDOW_OPTIONS).index(DEFAULT_WINDOW)
+    )
+    window_days = WINDOW_OPTIONS[window_label]
+    # The current period runs from N days ago through today (both included), the
+    # previous one is the N days before it
+    period_start = today - timedelta(days=window_days)
+    period_end = today + timedelta(days=1)
+
+    # Daily running totals per table, built once per data refresh; windows are binary searches
+    ad_index = get_index(basic_ad_df, "date", AD_SCORECARD_METRICS)
+    ig_index = get_index(basic_ig_df, "day", POST_SCORECARD_METRICS)
+    ad_cards = ad_scorecards(ad_index, period_start, period_end, window_days)
+    ig_cards = organic_scorecards(ig_index, period_start, period_end, window_days)
 
     # Build Scorecards Section
     ad_overview, post_overview = st.columns(2)
@@ -249,79 +207,50 @@ def main():
     # --- Ad Scorecards ---
     with ad_overview:
         st.subheader("Recent Ad Performance")
-        st.write("Last 30 Days")
+        st.write(f"Last {window_days} Days")
         ad_sc1, ad_sc2, ad_sc3 = st.columns(3)
 
         with ad_sc1:
-            current_impressions = basic_ad_df["impressions"].sum()
-            previous_impressions = ad_previous["impressions"].sum()
-            delta_impressions = ((current_impressions - previous_impressions) / previous_impressions * 100) if previous_impressions > 0 else 0
-            st.metric("Total Impressions", f"{int(current_impressions):,}", delta=f"{delta_impressions:+.1f}%")
+            card = ad_cards["impressions"]
+            st.metric("Total Impressions", f"{int(card['current']):,}", delta=f"{card['delta']:+.1f}%")
 
         with ad_sc2:
-            current_clicks = basic_ad_df["inline_link_clicks"].sum()
-            previous_clicks = ad_previous["inline_link_clicks"].sum()
-            current_ctr = (current_clicks / current_impressions * 100) if current_impressions > 0 else 0
-            previous_ctr = (previous_clicks / previous_impressions * 100) if previous_impressions > 0 else 0
-            delta_ctr = current_ctr - previous_ctr
-            st.metric("Click-Through Rate", f"{current_ctr:.1f}%", delta=f"{delta_ctr:+.1f}%")
+            card = ad_cards["ctr"]
+            st.metric("Click-Through Rate", f"{card['current']:.1f}%", delta=f"{card['delta']:+.1f}%")
 
         with ad_sc3:
-            current_spend = basic_ad_df["spend"].sum()
-            previous_spend = ad_previous["spend"].sum()
-            delta_spend = ((current_spend - previous_spend) / previous_spend * 100) if previous_spend > 0 else 0
-            st.metric("Spend", f"${int(current_spend):,}", delta=f"{delta_spend:+.1f}%")
+            card = ad_cards["spend"]
+            st.metric("Spend", f"${int(card['current']):,}", delta=f"{card['delta']:+.1f}%")
 
     # --- Organic IG Scorecards ---
     with post_overview:
         st.subheader("Recent Organic Performance")
-        st.write("Last 30 Days")
+        st.write(f"Last {window_days} Days")
         ig_sc1, ig_sc2, ig_sc3 = st.columns(3)
 
         with ig_sc1:
-            # Filter out story posts
-            non_story_current = basic_ig_df[basic_ig_df['is_story'] != True]
-            non_story_previous = ig_previous[ig_previous['is_story'] != True]
-            
-            # Count unique post_ids
-            current_posts = non_story_current["post_id"].nunique()
-            previous_posts = non_story_previous["post_id"].nunique()
-            delta_posts = ((current_posts - previous_posts) / previous_posts * 100) if previous_posts > 0 else 0
-            
-            st.metric("Total Posts", f"{current_posts:,}", delta=f"{delta_posts:+.1f}%")
+            card = ig_cards["posts"]
+            st.metric("Total Posts", f"{card['current']:,}", delta=f"{card['delta']:+.1f}%")
 
-        
         with ig_sc2:
-            current_likes = basic_ig_df["like_count"].sum()
-            previous_likes = ig_previous["like_count"].sum()
-            delta_likes = ((current_likes - previous_likes) / previous_likes * 100) if previous_likes > 0 else 0
-            st.metric("Like Count", f"{int(current_likes):,}", delta=f"{delta_likes:+.1f}%")
+            card = ig_cards["like_count"]
+            st.metric("Like Count", f"{int(card['current']):,}", delta=f"{card['delta']:+.1f}%")
         
         with ig_sc3:
-            current_comments = basic_ig_df.get("comment_count", pd.Series([0])).sum()
-            previous_comments = ig_previous.get("comment_count", pd.Series([0])).sum()
-            delta_comments = ((current_comments - previous_comments) / previous_comments * 100) if previous_comments > 0 else 0
-            st.metric("Comments", f"{int(current_comments):,}", delta=f"{delta_comments:+.1f}%")
+            card = ig_cards["comments_count"]
+            st.metric("Comments", f"{int(card['current']):,}", delta=f"{card['delta']:+.1f}%")
 
-    # Step 1: Ensure 'date' is datetime
-    basic_ad_df['date'] = pd.to_datetime(basic_ad_df['date'])
-    
-    # Step 2: Group and compute CPC
-    bar_data = basic_ad_df.groupby('date')[['spend', 'inline_link_clicks']].sum().reset_index()
-    bar_data['CPC'] = bar_data['spend'] / bar_data['inline_link_clicks']
-    
-    # Step 3: Melt for bar chart
-    bar_melted = bar_data.melt(id_vars='date', value_vars=['spend', 'inline_link_clicks'],
-                               var_name='Metric', value_name='Value')
+    def build_spend_chart():
+        # Step 1: Daily totals for the current window from the index, and CPC
+        bar_data = daily_ad_summary(ad_index, period_start, period_end)
 
-    col1, col2 = st.columns(2)
-    
-    # Step 4: Create dual-axis chart
-    with col1:
-        st.subheader("Bar + Line Chart: Daily Spend, Clicks, and CPC")
-        
+        # Step 2: Melt for bar chart
+        bar_melted = bar_data.melt(id_vars='date', value_vars=['spend', 'inline_link_clicks'],
+                                   var_name='Metric', value_name='Value')
+
+        # Step 3: Create dual-axis chart
         fig = go.Figure()
-    
+
         # Add bar traces
         for metric in ['spend', 'inline_link_clicks']:
             df_metric = bar_melted[bar_melted['Metric'] == metric]
@@ -331,7 +260,7 @@ def main():
                 name=metric,
                 yaxis='y1'
             ))
-    
+
         fig.add_trace(go.Scatter(
         x=bar_data['date'],
         y=bar_data['CPC'],
@@ -340,7 +269,7 @@ def main():
         line=dict(color='green', width=3, shape='spline'),
         yaxis='y2'
         ))
-        
+
         # Update layout to make the CPC axis tighter
         fig.update_layout(
             template='plotly_white',
@@ -357,35 +286,17 @@ def main():
             ),
             legend=dict(x=0.01, y=0.99)
         )
-    
+        return fig
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Bar + Line Chart: Daily Spend, Clicks, and CPC")
+        fig = cached_figure("spend_chart", [basic_ad_df], (window_days, period_end), build_spend_chart)
         st.plotly_chart(fig, use_container_width=True)
     
         with col2:
-            st.subheader("Pie Chart: Demographic Breakdown")
-
-            # Step 1: Let user choose Breakdown (dimension)
-            breakdown_options = basic_demo_df['Breakdown'].unique().tolist()
-            selected_breakdown = st.selectbox("Break down spend by:", breakdown_options)
-            
-            # Step 2: Filter data
-            filtered_demo = basic_demo_df[basic_demo_df['Breakdown'] == selected_breakdown]
-            
-            # Step 3: Group and sum spend
-            demo_summary = filtered_demo.groupby('Group')['spend'].sum().reset_index()
-            demo_summary.columns = ['Category', 'Value']
-            
-            # Step 4: Plot
-            fig2 = px.pie(
-                demo_summary,
-                names='Category',
-                values='Value',
-                height=500,
-                template='plotly_white',
-                title=f"Spend by {selected_breakdown}"
-            )
-            fig2.update_traces(textinfo='percent+label')
-            fig2.update_traces(textinfo='none')  # disables labels on the pie slices
-            st.plotly_chart(fig2, use_container_width=True)
+            draw_demographic_pie(basic_demo_df)
 
     # Layout
     col3, col4 = st.columns([1, 2])
@@ -400,40 +311,42 @@ def main():
         label2 = "Followers Gained"
         label3 = "Saves"
         
-        draw_metric_card_from_df(ig_account_df, metric_col1, label1, color="green", days=30)
-        draw_metric_card_from_df(ig_account_df, metric_col2, label2, color="green", days=30)
-        draw_metric_card_from_df(basic_ig_df, metric_col3, label3, color="green", days=30)
+        draw_metric_card_from_df(ig_account_df, metric_col1, label1, color="green", days=window_days)
+        draw_metric_card_from_df(ig_account_df, metric_col2, label2, color="green", days=window_days)
+        draw_metric_card_from_df(basic_ig_df, metric_col3, label3, color="green", days=window_days, date_col="day")
         
     with col4:
         st.subheader("Follower Count")
 
-        today = ig_account_df['date'].max()
-        start_current = today - timedelta(days=30)
-    
-        # Filter for current and previous periods
-        current_period_df = ig_account_df[(ig_account_df['date'] > start_current) & (ig_account_df['date'] <= today)]
-        
-        current_period_df['Date'] = pd.to_datetime(current_period_df['date'])
-        #ig_account_df['Follows'] = ig_account_df['follower_count']
-        current_period_df = (current_period_df.groupby('Date', as_index=False)['follower_count'].max().sort_values('Date'))
-        # Create the line chart
-        fig3 = px.line(
-            current_period_df,
-            x='Date',
-            y='follower_count',
-            title='Follower Growth Over Time',
-            markers=True,
-            template='plotly_white'
-        )
-        
-        fig3.update_layout(
-            height=400,
-            margin=dict(l=10, r=10, t=40, b=10),
-        )
-        
+        def build_follower_chart():
+            # Last 30 days of follower counts, thinned to the chart's point budget
+            current_period_df = downsample(follower_growth(ig_account_df, days=30), 'Date', 'follower_count')
+            # Create the line chart
+            fig3 = px.line(
+                current_period_df,
+                x='Date',
+                y='follower_count',
+                title='Follower Growth Over Time',
+                markers=True,
+                template='plotly_white'
+            )
+
+            fig3.update_layout(
+                height=400,
+                margin=dict(l=10, r=10, t=40, b=10),
+            )
+            return fig3
+
+        fig3 = cached_figure("follower_chart", [ig_account_df], (), build_follower_chart)
+
         # Display the chart
         st.plotly_chart(fig3, use_container_width=True)
 
+    render_memory_report()
+    render_connection_report()
+    render_timing_report()
+    render_figure_cache_report()
+
 
 if __name__ == "__main__":
     main()
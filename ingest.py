@@ -0,0 +1,232 @@
+"""
+Typed ingest: turns the Arrow tables the backends return into compact DataFrames.
+
+Each table has a schema below. Low-cardinality strings become categoricals
+(dictionary-encoded in Arrow, so no per-row Python strings are ever built) and
+counters are downcast to 32-bit. Everything else keeps the dtypes the BigQuery
+client would give it, except strings, which stay in Arrow storage.
+
+normalize_dates then gives every table canonical datetime64[ns] day columns once
+per refresh, so the pages never parse dates themselves, and parse_hashtags turns
+post captions into a list column of tags. version_token fingerprints each loaded
+table so caches can key on it instead of hashing the frame.
+
+Set INGEST_MEASURE=1 to log memory before/after for every load, or compare the
+local fixtures offline:
+
+    python ingest.py --dir fixtures
+"""
+import argparse
+import logging
+import os
+from pathlib import Path
+
+import db_dtypes
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from parquet_cache import day_values
+
+
+logger = logging.getLogger(__name__)
+
+MEASURE = os.environ.get("INGEST_MEASURE") == "1"
+
+AD_COUNTERS = dict.fromkeys(["impressions", "inline_link_clicks", "clicks", "reach"], "int32")
+AD_NAMES = dict.fromkeys(["ad_name", "adset_name", "campaign_name"], "category")
+
+# Column -> target dtype per table; columns a query didn't select are skipped
+TABLE_SCHEMAS = {
+    "basic_ad": {**AD_NAMES, **AD_COUNTERS},
+    "basic_ad_set": {**AD_NAMES, **AD_COUNTERS},
+    "basic_campaign": {**AD_NAMES, **AD_COUNTERS},
+    "ad_demographics": {"Breakdown": "category", "Group": "category", **AD_COUNTERS},
+    "delivery_device": {"device_platform": "category", **AD_COUNTERS},
+    "delivery_platform": {"publisher_platform": "category", **AD_COUNTERS},
+    "facebook_ads__url_report": {"url_host": "category", **AD_COUNTERS},
+    "instagram_business__posts": {
+        "username": "category",
+        "media_type": "category",
+        **dict.fromkeys([
+            "video_photo_reach", "video_photo_impressions", "video_photo_engagement",
+            "video_photo_saved", "like_count", "comments_count",
+        ], "int32"),
+    },
+    "user_insights": dict.fromkeys(["reach", "follower_count", "impressions"], "int32"),
+    "sp_analyzed_posts": {
+        "general_theme": "category",
+        "imagery_group": "category",
+        "background_imagery": "category",
+        **dict.fromkeys(["video_photo_reach", "shot_count", "object_count", "caption_length"], "int32"),
+    },
+    "account_info": dict.fromkeys(["day_rank", "followers_count", "media_count"], "int32"),
+    # Daily rollups (see rollups.py)
+    "daily_campaign": {**AD_NAMES, **AD_COUNTERS},
+    "daily_ad_set": {**AD_NAMES, **AD_COUNTERS},
+    "daily_ad": {**AD_NAMES, **AD_COUNTERS},
+    "daily_demographics": {"Breakdown": "category", "Group": "category", **AD_COUNTERS},
+    "daily_device": {"device_platform": "category", **AD_COUNTERS},
+    "daily_platform": {"publisher_platform": "category", **AD_COUNTERS},
+    "daily_url_host": {"url_host": "category", **AD_COUNTERS},
+}
+
+_NULLABLE_INTS = {
+    pa.int8(): pd.Int8Dtype(), pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(), pa.int64(): pd.Int64Dtype(),
+}
+
+
+def _pandas_type(arrow_type, compact_strings=True):
+    # Same dtypes as bigquery's to_dataframe (nullable ints/bools, dbdate), strings kept in Arrow
+    if arrow_type in _NULLABLE_INTS:
+        return _NULLABLE_INTS[arrow_type]
+    if pa.types.is_boolean(arrow_type):
+        return pd.BooleanDtype()
+    if pa.types.is_date32(arrow_type):
+        return db_dtypes.DateDtype()
+    if compact_strings and (pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def apply_schema(table, name):
+    # Dictionary-encode and downcast in Arrow, before any pandas objects exist
+    for col, dtype in TABLE_SCHEMAS.get(name, {}).items():
+        if col not in table.column_names:
+            continue
+        column = table.column(col)
+        try:
+            if dtype == "category":
+                if not pa.types.is_dictionary(column.type):
+                    column = column.dictionary_encode()
+            else:
+                # safe=True refuses overflow and lossy float -> int casts
+                column = column.cast(pa.type_for_alias(dtype), safe=True)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            logger.debug("Keeping %s.%s as %s: %s", name, col, column.type, e)
+            continue
+        table = table.set_column(table.schema.get_field_index(col), col, column)
+    return table
+
+
+def to_frame(table, name=None):
+    """
+    Converts an Arrow table from a backend into a DataFrame, applying the table's
+    schema when name has one.
+    """
+    typed = apply_schema(table, name) if name else table
+    df = typed.to_pandas(types_mapper=_pandas_type)
+    if MEASURE and name:
+        before = default_frame_bytes(table)
+        after = int(df.memory_usage(deep=True).sum())
+        logger.info("Ingested %s: %.1f MB -> %.1f MB", name, before / 1e6, after / 1e6)
+    return df
+
+
+def conform(df, name):
+    # Re-apply the schema after pandas-side merges (concat turns mismatched categoricals into objects)
+    if df is None:
+        return df
+    changes = {
+        col: dtype if dtype == "category" else pd.api.types.pandas_dtype(dtype.capitalize())
+        for col, dtype in TABLE_SCHEMAS.get(name, {}).items()
+        if col in df.columns and not (dtype == "category" and isinstance(df[col].dtype, pd.CategoricalDtype))
+    }
+    for col, dtype in changes.items():
+        try:
+            df = df.astype({col: dtype})
+        except (TypeError, ValueError, OverflowError):
+            pass
+    return df
+
+
+def normalize_dates(df, date_col=None):
+    """
+    Converts DATE columns to datetime64[ns] and, when date_col is a TIMESTAMP, adds
+    'day' (its UTC day as datetime64[ns]) and 'posted_on' (the day as display text).
+    Runs once per refresh, so page filters are plain vectorized comparisons.
+
+    Args:
+        df: Table as loaded (None passes through).
+        date_col: The table's date column from its spec (optional).
+    """
+    if df is None:
+        return df
+    changes = {
+        col: df[col].astype("datetime64[ns]")
+        for col in df.columns
+        if isinstance(df[col].dtype, db_dtypes.DateDtype)
+    }
+    if date_col in df.columns and date_col not in changes and pd.api.types.is_datetime64_any_dtype(df[date_col]):
+        day = day_values(df[date_col]).astype("datetime64[ns]")
+        changes["day"] = day
+        changes["posted_on"] = day.dt.strftime("%B %d, %Y").astype("string[pyarrow]")
+    return df.assign(**changes) if changes else df
+
+
+def parse_hashtags(df):
+    """
+    Adds 'hashtags': each post's lower-case tags (without '#') as an Arrow list column,
+    parsed once per refresh. Reads a stringified-list 'hashtags' column when the table
+    has one, otherwise the '#tags' in 'post_caption'. Tables with neither pass through.
+    """
+    if df is None:
+        return df
+    if "hashtags" in df.columns and not isinstance(df["hashtags"].dtype, pd.ArrowDtype):
+        source, pattern = df["hashtags"], r"#?(\w+)"
+    elif "post_caption" in df.columns and "hashtags" not in df.columns:
+        source, pattern = df["post_caption"], r"#(\w+)"
+    else:
+        return df
+    tags = find_all(source, pattern)
+    return df.assign(hashtags=pd.Series(tags, index=df.index, dtype=pd.ArrowDtype(tags.type)))
+
+
+def find_all(series, pattern):
+    # Lower-cased regex matches per row as an Arrow list array (null rows stay null)
+    matches = series.astype("string").str.lower().str.findall(pattern)
+    return pa.array(matches.tolist(), type=pa.list_(pa.string()), from_pandas=True)
+
+
+def version_token(df, source, date_col=None, synced_at=None):
+    """
+    Cheap fingerprint of a loaded table for cache keys: where it came from, the latest
+    day in it, its row count and when it was synced. Restated rows inside the sync
+    overlap keep the watermark and row count, so the sync time is part of the token;
+    rereading the same cached copy gives the same token.
+
+    Returns:
+        Tuple of (source, watermark as ISO string or None, row count, synced_at).
+    """
+    watermark = None
+    if date_col and date_col in df.columns and len(df):
+        latest = df[date_col].max()
+        watermark = None if pd.isna(latest) else pd.Timestamp(latest).isoformat()
+    return source, watermark, len(df), synced_at
+
+
+def default_frame_bytes(table):
+    # Memory the same table takes with bigquery's default to_dataframe dtypes
+    df = table.to_pandas(types_mapper=lambda t: _pandas_type(t, compact_strings=False))
+    return int(df.memory_usage(deep=True).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare default vs typed ingest memory for Parquet fixtures.")
+    parser.add_argument("--dir", default=os.environ.get("LOCAL_DATA_DIR", "fixtures"), help="Fixture directory")
+    args = parser.parse_args()
+
+    total_before = total_after = 0
+    for path in sorted(Path(args.dir).glob("*/*.parquet")):
+        table = pq.read_table(path)
+        before = default_frame_bytes(table)
+        after = int(to_frame(table, path.stem).memory_usage(deep=True).sum())
+        total_before += before
+        total_after += after
+        print(f"{path.stem:<28} {before / 1e6:>9.2f} MB -> {after / 1e6:>8.2f} MB  ({before / max(after, 1):.1f}x)")
+    print(f"{'total':<28} {total_before / 1e6:>9.2f} MB -> {total_after / 1e6:>8.2f} MB  ({total_before / max(total_after, 1):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Drops named tables from the dashboard caches without touching any other table.
+
+Run it when a sync lands, e.g. after the user_insights connector finishes:
+
+    python invalidate_cache.py user_insights
+    python invalidate_cache.py user_insights --full   # also re-pull its whole history
+"""
+import argparse
+
+import parquet_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Invalidate cached dashboard tables by name.")
+    parser.add_argument("tables", nargs="+", help="Table names, e.g. user_insights basic_ad")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Also delete the on-disk Parquet cache so the next load pulls the full history",
+    )
+    args = parser.parse_args()
+
+    for name in args.tables:
+        # Drop the files before touching the marker, so the reload can't pick them up
+        if args.full:
+            for path in parquet_cache.drop_cache_files(name):
+                print(f"Deleted {path}")
+        parquet_cache.mark_invalidated(name)
+        print(f"Invalidated {name}")
+
+
+if __name__ == "__main__":
+    main()
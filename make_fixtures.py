@@ -0,0 +1,194 @@
+"""
+Writes synthetic Parquet fixtures for every table the dashboards read, in the
+layout the local backend expects (see backends.py). Use it to profile, load-test
+or regression-test the pages without cloud access:
+
+    python make_fixtures.py --days 730 --ads 200
+    DATA_BACKEND=local python rollups.py
+    DATA_BACKEND=local streamlit run homepage.py
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+FB_PAGE_ID = 12101296
+IG_USER_ID = 17841400708882174
+IG_ACCOUNT_ID = 779159629
+
+DEMOGRAPHIC_GROUPS = {
+    "Age": ["18-24", "25-34", "35-44", "45-54", "55-64", "65+"],
+    "Age and Gender": [f"{age} {sex}" for age in ["18-24", "25-34", "35-44", "45+"] for sex in ["female", "male"]],
+    "Region": ["California", "Texas", "New York", "Florida", "Washington", "Oregon"],
+    "DMA Region": ["Los Angeles", "San Francisco", "Seattle", "Portland", "New York", "Dallas"],
+}
+DEVICES = ["mobile_app", "mobile_web", "desktop"]
+PLATFORMS = ["facebook", "instagram", "audience_network", "messenger"]
+URL_HOSTS = ["staypineapple.com", "book.staypineapple.com", "instagram.com", "linktr.ee"]
+MEDIA_TYPES = ["IMAGE", "VIDEO", "CAROUSEL_ALBUM"]
+HASHTAGS = ["#travel", "#hotel", "#pineapple", "#staycation", "#seattle", "#sanfrancisco", "#weekend", "#foodie"]
+THEMES = ["Lifestyle", "Promotion", "Food & Drink", "Rooms", "Local Guide"]
+IMAGERY = ["People", "Interior", "Food", "Cityscape", "Product"]
+BACKGROUNDS = ["Indoor", "Outdoor", "Studio", "Street"]
+
+
+def _daily_metrics(rng, n, scale=1.0):
+    # Spend, impressions and clicks that roughly hang together
+    impressions = rng.poisson(800 * scale, n)
+    clicks = rng.binomial(impressions, 0.012)
+    spend = np.round(impressions * rng.uniform(0.004, 0.012, n), 2)
+    return spend, impressions, clicks
+
+
+def _grid(dates, groups):
+    # Every (date, group) combination as two aligned arrays
+    return np.repeat(dates, len(groups)), np.tile(groups, len(dates))
+
+
+def build_fixtures(days, ads, posts_per_day, seed):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=days).date
+    tables = {}
+
+    # --- Ads: one row per ad per day, rolled up for ad sets and campaigns ---
+    ad_names = [f"Ad {i:03d}" for i in range(ads)]
+    adset_of = {name: f"Ad Set {i % max(ads // 4, 1):02d}" for i, name in enumerate(ad_names)}
+    campaign_of = {adset: f"Campaign {i % 5}" for i, adset in enumerate(sorted(set(adset_of.values())))}
+    ad_dates, ad_col = _grid(dates, ad_names)
+    spend, impressions, clicks = _daily_metrics(rng, len(ad_dates))
+    basic_ad = pd.DataFrame({
+        "account_id": FB_PAGE_ID,
+        "date": ad_dates,
+        "ad_id": [int(name.split()[-1]) for name in ad_col],
+        "ad_name": ad_col,
+        "adset_name": [adset_of[name] for name in ad_col],
+        "campaign_name": [campaign_of[adset_of[name]] for name in ad_col],
+        "spend": spend,
+        "impressions": impressions,
+        "inline_link_clicks": clicks,
+        "clicks": clicks + rng.poisson(3, len(ad_dates)),
+        "reach": (impressions * 0.8).astype("int64"),
+    })
+    tables["facebook_ads/basic_ad"] = basic_ad
+    metrics = ["spend", "impressions", "inline_link_clicks", "clicks", "reach"]
+    tables["facebook_ads/basic_ad_set"] = (
+        basic_ad.groupby(["account_id", "date", "adset_name", "campaign_name"], as_index=False)[metrics].sum()
+    )
+    tables["facebook_ads/basic_campaign"] = (
+        basic_ad.groupby(["account_id", "date", "campaign_name"], as_index=False)[metrics].sum()
+    )
+
+    # --- Demographic, device, platform and URL breakdowns ---
+    demo_frames = []
+    for breakdown, groups in DEMOGRAPHIC_GROUPS.items():
+        demo_dates, demo_groups = _grid(dates, groups)
+        spend, impressions, clicks = _daily_metrics(rng, len(demo_dates), scale=ads / len(groups))
+        demo_frames.append(pd.DataFrame({
+            "account_id": FB_PAGE_ID, "date": demo_dates, "Breakdown": breakdown, "Group": demo_groups,
+            "spend": spend, "impressions": impressions, "inline_link_clicks": clicks,
+        }))
+    tables["client/ad_demographics"] = pd.concat(demo_frames, ignore_index=True)
+
+    for table, col, groups in [("delivery_device", "device_platform", DEVICES),
+                               ("delivery_platform", "publisher_platform", PLATFORMS)]:
+        grid_dates, grid_groups = _grid(dates, groups)
+        spend, impressions, clicks = _daily_metrics(rng, len(grid_dates), scale=ads / len(groups))
+        tables[f"facebook_ads/{table}"] = pd.DataFrame({
+            "account_id": FB_PAGE_ID, "date": grid_dates, col: grid_groups,
+            "spend": spend, "impressions": impressions, "inline_link_clicks": clicks,
+        })
+
+    url_dates, url_hosts = _grid(dates, URL_HOSTS)
+    spend, impressions, clicks = _daily_metrics(rng, len(url_dates), scale=ads / len(URL_HOSTS))
+    tables["facebook_ads_facebook_ads/facebook_ads__url_report"] = pd.DataFrame({
+        "account_id": FB_PAGE_ID, "date_day": url_dates, "url_host": url_hosts,
+        "spend": spend, "clicks": clicks, "impressions": impressions,
+    })
+
+    # --- Instagram posts, account insights and analyzed posts ---
+    n_posts = max(int(days * posts_per_day), 1)
+    post_days = rng.integers(0, days, n_posts)
+    created = (
+        pd.to_datetime(np.asarray(dates)[post_days])
+        + pd.to_timedelta(rng.integers(0, 24 * 3600, n_posts), unit="s")
+    ).tz_localize("UTC")
+    reach = rng.gamma(2.0, 1500, n_posts).astype("int64")
+    likes = rng.binomial(reach, 0.05)
+    saves = rng.binomial(reach, 0.01)
+    comments = rng.binomial(reach, 0.004)
+    captions = [
+        f"Post {i}: weekend plans sorted " + " ".join(rng.choice(HASHTAGS, rng.integers(0, 4), replace=False))
+        for i in range(n_posts)
+    ]
+    posts = pd.DataFrame({
+        "user_id": IG_USER_ID,
+        "post_id": np.arange(n_posts) + 18_000_000_000_000_000,
+        "created_timestamp": created,
+        "username": "staypineapple",
+        "media_type": rng.choice(MEDIA_TYPES, n_posts),
+        "is_story": rng.random(n_posts) < 0.1,
+        "post_caption": captions,
+        "video_photo_reach": reach,
+        "video_photo_impressions": (reach * rng.uniform(1.1, 1.6, n_posts)).astype("int64"),
+        "video_photo_engagement": likes + saves + comments,
+        "video_photo_saved": saves,
+        "like_count": likes,
+        "comments_count": comments,
+    }).sort_values("created_timestamp", ignore_index=True)
+    tables["instagram_business_instagram_business/instagram_business__posts"] = posts
+
+    tables["instagram_business/user_insights"] = pd.DataFrame({
+        "id": IG_USER_ID,
+        "date": dates,
+        "reach": rng.gamma(2.0, 2500, days).astype("int64"),
+        "follower_count": rng.poisson(12, days),
+        "impressions": rng.gamma(2.0, 4000, days).astype("int64"),
+    })
+
+    analyzed = posts[posts["media_type"] == "VIDEO"]
+    shot_count = rng.integers(1, 30, len(analyzed))
+    video_len = np.round(rng.uniform(5, 90, len(analyzed)), 1)
+    tables["client/sp_analyzed_posts"] = pd.DataFrame({
+        "post_id": analyzed["post_id"].to_numpy(),
+        "general_theme": rng.choice(THEMES, len(analyzed)),
+        "imagery_group": rng.choice(IMAGERY, len(analyzed)),
+        "background_imagery": rng.choice(BACKGROUNDS, len(analyzed)),
+        "video_photo_reach": analyzed["video_photo_reach"].to_numpy(),
+        "video_len": video_len,
+        "shot_count": shot_count,
+        "object_count": rng.integers(0, 15, len(analyzed)),
+        "caption_length": analyzed["post_caption"].str.len().to_numpy(),
+        "avg_shot_len": np.round(video_len / shot_count, 2),
+    })
+
+    followers = 12_000 + np.cumsum(tables["instagram_business/user_insights"]["follower_count"].to_numpy())
+    tables["client/account_info"] = pd.DataFrame({
+        "ig_id": IG_ACCOUNT_ID,
+        "day_rank": np.arange(days, 0, -1),
+        "followers_count": followers,
+        "media_count": np.minimum(np.arange(1, days + 1) * posts_per_day, n_posts).astype("int64"),
+    })
+
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic Parquet fixtures for the local backend.")
+    parser.add_argument("--out", default="fixtures", help="Output directory (default: fixtures)")
+    parser.add_argument("--days", type=int, default=730, help="Days of history (default: 730)")
+    parser.add_argument("--ads", type=int, default=40, help="Number of ads (default: 40)")
+    parser.add_argument("--posts-per-day", type=float, default=1.0, help="Instagram posts per day (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    for name, df in build_fixtures(args.days, args.ads, args.posts_per_day, args.seed).items():
+        path = Path(args.out) / f"{name}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(path, index=False)
+        print(f"Wrote {path} ({len(df):,} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Headless compute layer behind the three pages.
+
+Every number the pages show comes from a function here:
+- scorecards and metric cards
+- daily ad summaries
+- demographic, device, platform and URL breakdowns
+- post filters, post KPIs and engagement rates
+- top posts and engagement series
+
+Nothing here draws or reads widgets, so each function can be called, timed or run in
+a batch job without a Streamlit session. Inputs are plain frames or the indexes and
+cubes built from them (timeseries.build_index, breakdown_cube.build_cube). The pages
+pass in the memoized ones and only format and draw the results. Hashtag stats
+(hashtags.py) and creative aggregates (creative.py) follow the same split already.
+"""
+import numpy as np
+import pandas as pd
+
+from breakdown_cube import daily_frame, day_range, fold_groups, ratio, top_groups, totals
+from timeseries import last_day, period_over_period, window_series
+
+
+AD_SCORECARD_METRICS = ["impressions", "inline_link_clicks", "spend"]
+POST_SCORECARD_METRICS = ["is_story", "like_count", "comments_count"]
+
+
+def _change(current, previous):
+    # Percent change, 0 without a previous total (as in timeseries.period_over_period)
+    return (current - previous) / previous * 100 if previous > 0 else 0
+
+
+def _card(current, previous, delta):
+    return {"current": current, "previous": previous, "delta": delta}
+
+
+def ad_scorecards(index, start, end, days):
+    """
+    Ad scorecards for the window [start, end) against the `days` days before start.
+
+    Args:
+        index: Daily index of the ad rollup over AD_SCORECARD_METRICS.
+        start: First day of the current window.
+        end: Exclusive end of the current window.
+        days: Days in the previous window.
+
+    Returns:
+        Dict of impressions, ctr and spend -> {current, previous, delta}. Deltas are
+        percent changes, except ctr's, which is in percentage points.
+    """
+    impressions = _card(*period_over_period(index, "impressions", end, days, start))
+    clicks = _card(*period_over_period(index, "inline_link_clicks", end, days, start))
+    ctr = {
+        period: clicks[period] / impressions[period] * 100 if impressions[period] > 0 else 0
+        for period in ("current", "previous")
+    }
+    return {
+        "impressions": impressions,
+        "ctr": _card(ctr["current"], ctr["previous"], ctr["current"] - ctr["previous"]),
+        "spend": _card(*period_over_period(index, "spend", end, days, start)),
+    }
+
+
+def organic_scorecards(index, start, end, days):
+    """
+    Post scorecards for the window [start, end) against the `days` days before start.
+
+    Args:
+        index: Daily index of the posts table over POST_SCORECARD_METRICS.
+        start: First day of the current window.
+        end: Exclusive end of the current window.
+        days: Days in the previous window.
+
+    Returns:
+        Dict of posts (stories excluded), like_count and comments_count -> {current, previous, delta}.
+    """
+    # One row per post, so posts = rows minus stories
+    rows = period_over_period(index, "rows", end, days, start)
+    stories = period_over_period(index, "is_story", end, days, start)
+    current, previous = int(rows[0] - stories[0]), int(rows[1] - stories[1])
+    return {
+        "posts": _card(current, previous, _change(current, previous)),
+        "like_count": _card(*period_over_period(index, "like_count", end, days, start)),
+        "comments_count": _card(*period_over_period(index, "comments_count", end, days, start)),
+    }
+
+
+def metric_card(index, metric, days, end=None):
+    """
+    Value, delta and sparkline series of one metric card, from a single read of the index.
+
+    Args:
+        index: Daily index holding the metric.
+        metric: Metric to total.
+        days: Days per period.
+        end: Exclusive end of the current period (default the day after the latest day in the data).
+
+    Returns:
+        Dict with current, previous, delta (percent) and daily (Series of the current period's days).
+    """
+    if end is None:
+        latest = last_day(index)
+        end = (latest if latest is not None else pd.Timestamp("today").normalize()) + pd.Timedelta(days=1)
+    end = pd.Timestamp(end)
+
+    # One read covers both periods; the current one doubles as the sparkline
+    daily = window_series(index, metric, end - pd.Timedelta(days=2 * days), end)
+    in_current = daily.index >= end - pd.Timedelta(days=days)
+    current, previous = daily[in_current].sum(), daily[~in_current].sum()
+    card = _card(current, previous, _change(current, previous))
+    card["daily"] = daily[in_current]
+    return card
+
+
+def daily_ad_summary(index, start, end):
+    """
+    Daily spend, link clicks and CPC for the days in [start, end).
+
+    Returns:
+        DataFrame with date, spend, inline_link_clicks and CPC (NaN or inf on days without clicks).
+    """
+    summary = pd.DataFrame({
+        metric: window_series(index, metric, pd.Timestamp(start), pd.Timestamp(end))
+        for metric in ["spend", "inline_link_clicks"]
+    }).rename_axis("date").reset_index()
+    summary["CPC"] = summary["spend"] / summary["inline_link_clicks"]
+    return summary
+
+
+def demographic_spend(df, breakdown):
+    # Spend per group of one breakdown of the stacked demographics rollup, as Category / Value
+    rows = df[df["Breakdown"] == breakdown]
+    summary = rows.groupby("Group", observed=True)["spend"].sum().reset_index()
+    summary.columns = ["Category", "Value"]
+    return summary
+
+
+def follower_growth(df, days=30):
+    # Follower count per day (the day's max) over the `days` days up to the latest one
+    latest = df["date"].max()
+    recent = df[(df["date"] > latest - pd.Timedelta(days=days)) & (df["date"] <= latest)]
+    return recent.groupby("date", as_index=False)["follower_count"].max().rename(columns={"date": "Date"})
+
+
+def breakdown_kpis(cube, days, columns):
+    # Totals of every ad metric over a day slice and the selected groups of a breakdown cube
+    return {metric: totals(cube, metric, days, columns) for metric in cube["cells"]}
+
+
+def performance_series(cube, metric, days, columns, group_col, max_groups):
+    """
+    Daily values of an ad metric per group, for the Performance Over Time chart.
+
+    Up to max_groups lines are kept, ranked by the metric over the window. CTR and CPC
+    are ranked by the volume they are measured on, so tiny groups with extreme ratios
+    don't crowd out the big ones. The other groups fold into one "Other" line.
+
+    Args:
+        cube: Breakdown cube from get_cube.
+        metric: spend, impressions, inline_link_clicks, ctr or cpc.
+        days: Day slice from day_range.
+        columns: Selected group positions.
+        group_col: Name for the group column.
+        max_groups: Most lines before the rest fold into "Other".
+
+    Returns:
+        Long DataFrame of date, group_col and metric.
+    """
+    rank_metric = {"ctr": "impressions", "cpc": "inline_link_clicks"}.get(metric, metric)
+    keep, rest = top_groups(cube, cube["cells"][rank_metric], days, columns, max_groups)
+    folded = fold_groups(cube, keep, rest)
+
+    # CTR and CPC are ratios of the folded cells (0 when undefined)
+    cells = folded["cells"]
+    if metric == "ctr":
+        values = ratio(cells["inline_link_clicks"], cells["impressions"])
+    elif metric == "cpc":
+        values = ratio(cells["spend"], cells["inline_link_clicks"])
+    else:
+        values = cells[metric]
+    series = daily_frame(folded, values, days, np.arange(len(folded["groups"])), group_col)
+    return series.rename(columns={"value": metric})
+
+
+def group_totals(cube, metric, start_date, end_date, group_name):
+    # Total of a metric per group over [start_date, end_date], largest first
+    return (
+        totals(cube, metric, day_range(cube, start_date, end_date))
+        .rename_axis(group_name)
+        .reset_index(name=metric)
+        .sort_values(metric, ascending=False, ignore_index=True)
+    )
+
+
+def account_overview(posts, follows):
+    # Account name and the latest follower and media counts (day_rank 1)
+    latest = follows.loc[follows["day_rank"] == 1]
+    return {
+        "account": posts["username"].iloc[0],
+        "followers": latest["followers_count"].iloc[0],
+        "media_count": latest["media_count"].iloc[0],
+    }
+
+
+def filter_posts(posts, matches=None, content_type="All", start_date=None, end_date=None):
+    """
+    Posts matching the page filters, with their engagement rate.
+
+    Args:
+        posts: Posts table with the 'day' column from ingest.
+        matches: Row positions from post_index.search (None for every post).
+        content_type: Media type to keep, case-insensitive ("All" keeps every type).
+        start_date, end_date: Inclusive day range (None leaves the dates unfiltered).
+
+    Returns:
+        Filtered posts with engagement_rate (engagement / reach, NA without reach).
+    """
+    if matches is not None:
+        posts = posts.iloc[matches]
+    if content_type != "All":
+        posts = posts[posts["media_type"].str.lower() == content_type.lower()]
+    if start_date is not None and end_date is not None:
+        posts = posts[(posts["day"] >= start_date) & (posts["day"] <= end_date)]
+    return posts.assign(engagement_rate=posts["video_photo_engagement"] / posts["video_photo_reach"].replace(0, pd.NA))
+
+
+def filter_account(account, start_date, end_date):
+    # Account insights in [start_date, end_date], with missing follower counts as 0
+    account = account.assign(follower_count=account["follower_count"].fillna(0))
+    return account[(account["date"] >= start_date) & (account["date"] <= end_date)]
+
+
+def post_kpis(posts, account):
+    """
+    Post metric scorecards for filtered posts and account insights.
+
+    Returns:
+        Dict with posts (stories excluded), reach, followers_gained, likes and
+        engagement_rate (mean over posts with reach, NaN when none has).
+    """
+    return {
+        "posts": posts[posts.get("is_story", False) != True]["post_id"].nunique(),
+        "reach": posts["video_photo_reach"].sum(),
+        "followers_gained": account["follower_count"].sum() if "follower_count" in account.columns else 0,
+        "likes": posts["like_count"].sum(),
+        "engagement_rate": posts["engagement_rate"].mean(),
+    }
+
+
+def top_posts(posts, n=10):
+    # Posts with the most reach, as Posted On / Caption / Reach / Likes / Saves
+    top = (
+        posts[["posted_on", "post_caption", "video_photo_reach", "like_count", "video_photo_saved"]]
+        .sort_values(by="video_photo_reach", ascending=False)
+        .dropna(subset=["video_photo_reach"])
+        .head(n)
+    )
+    top.columns = ["Posted On", "Caption", "Reach", "Likes", "Saves"]
+    return top.reset_index(drop=True)
+
+
+def engagement_series(posts, account, metric):
+    # Daily total of a post metric, or of follower_count from the account insights, as date / Value
+    if metric == "follower_count":
+        daily = account.groupby("date")[metric].sum().reset_index()
+    else:
+        daily = posts.groupby("day")[metric].sum().reset_index().rename(columns={"day": "date"})
+    return daily.rename(columns={metric: "Value"})
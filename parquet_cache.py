@@ -0,0 +1,140 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# Where the per-table Parquet files live (override with DATA_CACHE_DIR)
+CACHE_DIR = Path(os.environ.get("DATA_CACHE_DIR", ".data_cache"))
+
+# Meta restates the last few days of ad metrics, so those days are re-fetched on every sync
+OVERLAP_DAYS = 3
+
+# File metadata key holding the first day the cached rows are complete from ("" for the whole history)
+COVERED_FROM_KEY = b"covered_from"
+
+# Touching a file named after a table in here drops that table from the running apps
+INVALIDATE_DIR = CACHE_DIR / "invalidate"
+
+
+def cache_path(name, query):
+    # One file per table and query shape, so changing the projected columns starts a new file
+    digest = hashlib.sha1(query.encode()).hexdigest()[:12]
+    return CACHE_DIR / f"{name}-{digest}.parquet"
+
+
+def read_cache(path):
+    if not path.exists():
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        # A partial or unreadable file is just a cache miss
+        return None
+
+
+def write_cache(path, df, covered_from=None):
+    """
+    Writes a table's rows to its cache file, along with the first day they are
+    complete from (None for the whole history). The temp file is swapped in, so
+    readers never see a half-written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        covered = b"" if covered_from is None else str(pd.Timestamp(covered_from).date()).encode()
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), COVERED_FROM_KEY: covered})
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def day_values(series):
+    # Day-level datetime64 values for DATE and TIMESTAMP columns alike (timestamps in UTC)
+    values = pd.to_datetime(series)
+    if values.dt.tz is not None:
+        values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+    return values.dt.normalize()
+
+
+def covered_from(path, cached, date_col):
+    """
+    First day the cached rows are complete from, or None when they hold the whole
+    history. Files written before this was recorded count from their first cached day.
+    """
+    try:
+        covered = (pq.read_schema(path).metadata or {}).get(COVERED_FROM_KEY)
+    except Exception:
+        covered = None
+    if covered is not None:
+        return pd.Timestamp(covered.decode()).date() if covered else None
+    if cached is None or cached.empty or not date_col or date_col not in cached.columns:
+        return None
+    first = day_values(cached[date_col]).min()
+    return None if pd.isna(first) else first.date()
+
+
+def covers(covered, start_date):
+    # Whether rows complete from `covered` (None: the whole history) include every day from start_date on
+    if covered is None:
+        return True
+    return start_date is not None and pd.Timestamp(start_date).date() >= covered
+
+
+def sync_start(cached, date_col):
+    """
+    Returns the first day to re-fetch on top of the cached rows, or None when the
+    whole table has to be pulled (no cache, or no date column to sync on).
+    """
+    if cached is None or cached.empty or not date_col or date_col not in cached.columns:
+        return None
+    watermark = day_values(cached[date_col]).max()
+    if pd.isna(watermark):
+        return None
+    return (watermark - pd.Timedelta(days=OVERLAP_DAYS)).date()
+
+
+def merge_increment(cached, increment, date_col, since):
+    # Fresh rows replace every cached row from the first synced day onward
+    kept = cached[day_values(cached[date_col]) < pd.Timestamp(since)]
+    return pd.concat([kept, increment], ignore_index=True)
+
+
+def trim_window(df, date_col, start_date):
+    # Drop rows from before the page's date window (in memory; the cache file keeps them)
+    if df is None or start_date is None or not date_col:
+        return df
+    return df[day_values(df[date_col]) >= pd.Timestamp(start_date)].reset_index(drop=True)
+
+
+def mark_invalidated(name):
+    # Touch the table's marker; apps reload any copy loaded before this moment
+    INVALIDATE_DIR.mkdir(parents=True, exist_ok=True)
+    marker = INVALIDATE_DIR / name
+    marker.touch()
+    os.utime(marker)
+
+
+def invalidated_at(name):
+    # When the table was last invalidated (0 if never)
+    try:
+        return (INVALIDATE_DIR / name).stat().st_mtime
+    except OSError:
+        return 0
+
+
+def drop_cache_files(name):
+    # Delete every Parquet file for the table, so its next sync is a full pull
+    removed = []
+    for path in CACHE_DIR.glob(f"{name}-*.parquet"):
+        path.unlink(missing_ok=True)
+        removed.append(path)
+    return removed
@@ -1,15 +1,26 @@
 import streamlit as st
 import pandas as pd
-from google.cloud import bigquery  # If you're using BigQuery
 import requests  # If you're calling the Graph API directly
 import json
-from google.oauth2 import service_account
 import matplotlib.pyplot as plt
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from collections import defaultdict
-import statsmodels.api as sm
+from annotations import add_post_annotations, post_annotations
+from backends import get_backend
+from creative import get_creative_insights
+from bq_client import render_connection_report
+from data_loader import get_tables, render_data_status, required_tables
+from data_store import render_memory_report, track_session
+from downsample import downsample
+from figure_cache import cached_figure, render_figure_cache_report
+from hashtags import get_hashtag_performance
+from metrics import account_overview, engagement_series, filter_account, filter_posts, post_kpis, top_posts
+from post_index import get_post_index, search
+from sections import render_timing_report, section, start_page
+
+# Shared tables are read-only; copy-on-write keeps them that way (see data_store.share_tables)
+pd.set_option("mode.copy_on_write", True)
 
 # Set page components
 st.set_page_config(page_title="SP Bizz Overview", layout="wide", page_icon="📱")
@@ -31,391 +42,356 @@ PROJECT_ID = "bizbuddydemo-v3"
 FB_PAGE_ID = 12101296
 IG_USER_ID = 17841400708882174
 
-# Load credentials and project ID from st.secrets
-credentials = service_account.Credentials.from_service_account_info(
-    st.secrets["gcp_service_account"]
-)
-
-# Initialize BigQuery client
-client = bigquery.Client(credentials=credentials, project=PROJECT_ID)
-
-@st.cache_data
-def pull_ig_insights(dataset_id, table_id):
-    # Build the table reference
-    table_ref = f"{PROJECT_ID}.{dataset_id}.{table_id}"
-    # Query to fetch all data from the table
-    query = f"SELECT * FROM `{table_ref}` WHERE user_id = {IG_USER_ID}"
-    try:
-        # Execute the query
-        query_job = client.query(query)
-        result = query_job.result()
-        # Convert the result to a DataFrame
-        data = result.to_dataframe()
-        return data
-    except Exception as e:
-        st.error(f"Error fetching data: {e}")
-        return None
-
-@st.cache_data
-def pull_ig_account_insights(dataset_id, table_id):
-    # Build the table reference
-    table_ref = f"{PROJECT_ID}.{dataset_id}.{table_id}"
-    # Query to fetch all data from the table
-    query = f"SELECT * FROM `{table_ref}` WHERE id = {IG_USER_ID}"
-    try:
-        # Execute the query
-        query_job = client.query(query)
-        result = query_job.result()
-        # Convert the result to a DataFrame
-        data = result.to_dataframe()
-        return data
-    except Exception as e:
-        st.error(f"Error fetching data: {e}")
-        return None
-
-@st.cache_data
-def pull_post_analysis(dataset_id, table_id):
-    # Build the table reference
-    table_ref = f"{PROJECT_ID}.{dataset_id}.{table_id}"
-    # Query to fetch all data from the table
-    query = f"SELECT * FROM `{table_ref}`"
-    try:
-        # Execute the query
-        query_job = client.query(query)
-        result = query_job.result()
-        # Convert the result to a DataFrame
-        data = result.to_dataframe()
-        return data
-    except Exception as e:
-        st.error(f"Error fetching data: {e}")
-        return None
-
-@st.cache_data
-def pull_follows_data(dataset_id, table_id):
-    # Build the table reference
-    table_ref = f"{PROJECT_ID}.{dataset_id}.{table_id}"
-    # Query to fetch all data from the table
-    query = f"SELECT * FROM `{table_ref}` WHERE ig_id = 779159629;"
-    try:
-        # Execute the query
-        query_job = client.query(query)
-        result = query_job.result()
-        # Convert the result to a DataFrame
-        data = result.to_dataframe()
-        return data
-    except Exception as e:
-        st.error(f"Error fetching data: {e}")
-        return None
-
-
-def compute_hashtag_performance(df, hashtag_col='hashtags', metric_col='reach'):
-    performance_dict = defaultdict(list)
-
-    for idx, row in df.iterrows():
-        hashtags = row.get(hashtag_col)
-        metric_value = row.get(metric_col)
-
-        # Try to parse stringified lists
-        if isinstance(hashtags, str):
-            try:
-                hashtags = ast.literal_eval(hashtags)
-            except Exception:
-                hashtags = []
-
-        if isinstance(hashtags, list) and pd.notnull(metric_value):
-            for tag in hashtags:
-                performance_dict[str(tag).lower()].append(metric_value)
-
-    if not performance_dict:
+# Shared warehouse backend (BigQuery, or local fixtures with DATA_BACKEND=local)
+backend = get_backend(PROJECT_ID)
+
+# Account filters for each source
+IG_USER_FILTER = f"user_id = {IG_USER_ID}"
+IG_ACCOUNT_FILTER = f"id = {IG_USER_ID}"
+FOLLOWS_FILTER = "ig_id = 779159629"
+
+# Instagram insights sync more often than the ad tables, so re-sync them sooner
+IG_TTL = 30 * 60
+
+# Tables this page reads, the columns it needs, and the date column used for
+# incremental cache syncs
+TABLES = {
+    "instagram_business__posts": {
+        "table_ref": f"{PROJECT_ID}.instagram_business_instagram_business.instagram_business__posts",
+        "where": IG_USER_FILTER,
+        "columns": [
+            "post_id", "created_timestamp", "username", "media_type", "is_story", "post_caption",
+            "video_photo_reach", "video_photo_impressions", "video_photo_engagement", "video_photo_saved",
+            "like_count", "comments_count",
+        ],
+        "date_col": "created_timestamp",
+        "ttl": IG_TTL,
+    },
+    "user_insights": {
+        "table_ref": f"{PROJECT_ID}.instagram_business.user_insights",
+        "where": IG_ACCOUNT_FILTER,
+        "columns": ["date", "follower_count"],
+        "date_col": "date",
+        "ttl": IG_TTL,
+    },
+    "sp_analyzed_posts": {
+        "table_ref": f"{PROJECT_ID}.client.sp_analyzed_posts",
+        "columns": [
+            "general_theme", "imagery_group", "background_imagery", "video_photo_reach",
+            "video_len", "shot_count", "object_count", "caption_length", "avg_shot_len",
+        ],
+    },
+    "account_info": {
+        "table_ref": f"{PROJECT_ID}.client.account_info",
+        "where": FOLLOWS_FILTER,
+        "columns": ["day_rank", "followers_count", "media_count"],
+    },
+}
+
+# Tables each section of the page reads
+SECTION_TABLES = {
+    "filters": ["instagram_business__posts"],
+    "account_overview": ["instagram_business__posts", "account_info"],
+    "post_metrics": ["instagram_business__posts", "user_insights"],
+    "top_posts": ["instagram_business__posts"],
+    "engagement": ["instagram_business__posts", "user_insights"],
+    "creative_insights": ["sp_analyzed_posts"],
+}
+
+def get_data(names):
+    # Fetch tables the first time a section asks for them; later calls read the shared cache
+    return get_tables(backend, TABLES, names)
+
+
+@section("Hashtag performance")
+def draw_hashtag_performance(basic_ig_df, df, view_key):
+    # --- Hashtag Performance (tags parsed at ingest; stats cached per data version and filters) ---
+    # Fragment: switching the ranking metric reruns only this table
+    st.markdown("### #️⃣ Hashtag Performance")
+    hashtag_metrics = {
+        "Reach": "video_photo_reach",
+        "Likes": "like_count",
+        "Saves": "video_photo_saved",
+    }
+    selected_hashtag_label = st.selectbox("Rank hashtags by:", list(hashtag_metrics.keys()), key="hashtag_metric")
+    hashtag_metric = hashtag_metrics[selected_hashtag_label]
+    hashtag_stats = get_hashtag_performance(basic_ig_df, df, hashtag_metric, view_key=view_key)
+    if hashtag_stats.empty:
         st.write("⚠️ No hashtags matched or none had valid reach values.")
-        return pd.DataFrame(columns=['hashtag', 'count', f'avg_{metric_col}'])
+    else:
+        # Renamed on a copy: the stats frame is cached and shared
+        hashtag_stats = hashtag_stats.set_axis(
+            ['Hashtag', 'Posts', f'Avg {selected_hashtag_label}', f'Median {selected_hashtag_label}', f'Total {selected_hashtag_label}'],
+            axis=1,
+        )
+        st.dataframe(hashtag_stats.round(1), hide_index=True)
 
-    result = pd.DataFrame([
-        {'hashtag': tag, 'count': len(values), f'avg_{metric_col}': np.mean(values)}
-        for tag, values in performance_dict.items()
-    ])
 
-    return result.sort_values(by=f'avg_{metric_col}', ascending=False).reset_index(drop=True)
+@section("Engagement chart")
+def draw_engagement_chart(basic_ig_df, ig_account_df, df, account_df, view_key):
+    # --- SECTION 4: Engagement Breakdown ---
+    # Fragment: switching the metric reruns only this chart; figures are cached per data version and filters
+    st.markdown("### 📈 Engagement Over Time")
 
+    # Metric selection dropdown
+    metric_options = {
+        "Reach": "video_photo_reach",
+        "Likes": "like_count",
+        "Saves": "video_photo_saved",
+        "Engagement Rate": "engagement_rate",
+        "Followers Gained": "follower_count"
+    }
+    selected_metric_label = st.selectbox("Metric to display:", list(metric_options.keys()), index=0)
+    selected_metric_col = metric_options[selected_metric_label]
 
-@st.cache_data
-def get_data():
-    
-    #Get ig posts
-    ig_dataset_id = "instagram_business_instagram_business"
-    ig_table_id = "instagram_business__posts"
-    basic_ig_df = pull_ig_insights(ig_dataset_id, ig_table_id)
+    def build_chart():
+        # Followers Gained comes from ig_account_df; both are bucketed on datetime64 days
+        plot_df = engagement_series(df, account_df, selected_metric_col)
+
+        # Long ranges: LTTB down to the chart's point budget
+        plot_df = downsample(plot_df, 'date', 'Value')
+
+        # Plot full-width chart
+        fig = px.line(
+            plot_df,
+            x='date',
+            y='Value',
+            title=f"{selected_metric_label} Over Time",
+            labels={"date": "Date", "Value": selected_metric_label},
+            template="plotly_white"
+        )
 
-    #Get ig posts
-    ig_account_dataset_id = "instagram_business"
-    ig_account_table_id = "user_insights"
-    ig_account_df = pull_ig_account_insights(ig_account_dataset_id, ig_account_table_id)
+        # Dotted line and hover point per posting day (clustered when days outnumber the chart's pixels)
+        add_post_annotations(fig, post_annotations(df['day'], df['post_caption']))
+        return fig
 
-    #Get analyzed posts
-    client_dataset_id = "client"
-    client_table_id = "sp_analyzed_posts"
-    pa_df = pull_post_analysis(client_dataset_id, client_table_id)
+    fig = cached_figure("engagement_chart", [basic_ig_df, ig_account_df], (selected_metric_col, view_key), build_chart)
+    st.plotly_chart(fig, use_container_width=True)
 
-    ig_follows_dataset_id = "client"
-    ig_follows_table_id = "account_info"
-    follows_df = pull_follows_data(ig_follows_dataset_id, ig_follows_table_id)
 
-    #return all dfs
-    return basic_ig_df, ig_account_df, pa_df, follows_df
+@section("Creative breakdown")
+def draw_creative_breakdown(pa_df, insights, creative_options):
+    # Fragment: switching the creative element reruns only this chart (breakdowns come precomputed)
+    st.markdown("#### 📊 Performance by Creative Element")
 
-def main():
-    basic_ig_df, ig_account_df, pa_df, follows_df = get_data()
-    st.title("📱 Social Post Breakdown")
+    selected_creative = st.selectbox("Break down reach by:", list(creative_options.keys()))
+    creative_col = creative_options[selected_creative]
 
-    # --- SECTION 1: FILTERS ---
-    st.markdown("### 🔧 Filter Options")
-    col1, col2 = st.columns(2)
+    if creative_col in insights["breakdowns"]:
+        def build_chart():
+            reach_summary = insights["breakdowns"][creative_col].rename(columns={creative_col: selected_creative})
 
-    with col1:
-        # Dynamically load media types from actual data
-        media_types = sorted(basic_ig_df['media_type'].dropna().unique())
-        content_type = st.selectbox("Content Type", ["All"] + media_types)
+            return px.bar(
+                reach_summary,
+                x=selected_creative,
+                y='Average_Reach',
+                hover_data={'Post_Count': True},
+                title=f"Average Reach by {selected_creative}",
+                template='plotly_white'
+            )
 
-    with col2:
-        basic_ig_df['created_timestamp'] = pd.to_datetime(basic_ig_df['created_timestamp']).dt.date
-        default_end = basic_ig_df['created_timestamp'].max()
-        default_start = default_end - timedelta(days=30)
-        selected_dates = st.date_input("Date Range", [default_start, default_end])
+        fig_creative = cached_figure("creative_breakdown", [pa_df], (creative_col,), build_chart)
+        st.plotly_chart(fig_creative, use_container_width=True)
+    else:
+        st.info("Creative column or reach data missing in `pa_df`.")
 
-    # --- SECTION 2: SCORECARDS ---
-    st.markdown("### 📊 Account Overview")
-    sc1, sc2, sc3 = st.columns(3)
 
-    with sc1:
-        account_name = basic_ig_df['username'].iloc[0]
-        st.metric("Account", account_name)
+@section("Creative scatter")
+def draw_creative_scatter(pa_df, insights, x_options):
+    # Fragment: switching the attribute reruns only this chart
+    st.markdown("### 🎥 Reach vs. Creative Attributes")
 
-    with sc2:
-        total_followers = follows_df.loc[follows_df['day_rank'] == 1, 'followers_count'].iloc[0]
-        st.metric("Total Followers", f"{int(total_followers):,}" if pd.notna(total_followers) else "N/A")
+    selected_x = st.selectbox("Choose a variable to compare with Reach:", x_options)
 
-    with sc3:
-        media_count = follows_df.loc[follows_df['day_rank'] == 1, 'media_count'].iloc[0]
-        st.metric("Media Count", f"{int(media_count):,}" if pd.notna(total_followers) else "N/A")
+    fit = insights["fits"].get(selected_x)
+
+    def build_chart():
+        # Filter out rows with missing data in either selected or reach
+        filtered_df = pa_df[[selected_x, 'video_photo_reach']].dropna()
 
-    # Filtered copy of post data
-    df = basic_ig_df.copy()
-    df['date'] = pd.to_datetime(df['created_timestamp']).dt.date
+        fig = px.scatter(
+            filtered_df,
+            x=selected_x,
+            y='video_photo_reach',
+            title=f"Reach vs. {selected_x}",
+            labels={selected_x: selected_x.replace('_', ' ').title(), 'reach': 'Reach'},
+            opacity=0.7
+        )
 
-    account_df = ig_account_df.copy()
-    account_df['follower_count'] = account_df['follower_count'].fillna(0)
+        # Precomputed OLS trend line across the observed range
+        if fit and fit["n"] >= 2 and pd.notna(fit["slope"]):
+            x_range = [filtered_df[selected_x].min(), filtered_df[selected_x].max()]
+            fig.add_trace(go.Scatter(
+                x=x_range,
+                y=[fit["intercept"] + fit["slope"] * x for x in x_range],
+                mode="lines",
+                name="OLS trend",
+                hovertemplate=f"y = {fit['slope']:,.2f}x + {fit['intercept']:,.2f}<br>R² = {fit['r2']:.3f}<extra></extra>",
+                showlegend=False
+            ))
+        return fig
+
+    fig = cached_figure("creative_scatter", [pa_df], (selected_x,), build_chart)
+    st.plotly_chart(fig, use_container_width=True)
 
-    ig_post_df = basic_ig_df.copy()
-    ig_post_df['posted_on'] = pd.to_datetime(ig_post_df['created_timestamp']).dt.strftime("%B %d, %Y")
+    if fit and fit["n"] >= 3:
+        low, high = fit["slope_ci"]
+        st.caption(
+            f"Slope {fit['slope']:,.2f} reach per unit (95% CI {low:,.2f} to {high:,.2f}), "
+            f"R² {fit['r2']:.3f}, {fit['n']} posts"
+        )
 
 
-    # Content type filtering
-    if content_type != "All":
-        df = df[df['media_type'].str.lower() == content_type.lower()]
-        ig_post_df = ig_post_df[ig_post_df['media_type'].str.lower() == content_type.lower()]
+def draw_filtered_posts(basic_ig_df, ig_account_df, matches, content_type, selected_dates, selected_tags, caption_query):
+    """
+    Draws the sections that depend on the post filters: post metrics, top posts, hashtag
+    performance and engagement over time. Shows a warning instead when no post matches
+    or the date selection is invalid, so the rest of the page still renders.
+
+    Args:
+        basic_ig_df: Shared posts table.
+        ig_account_df: Shared account insights table.
+        matches: Row positions from post_index.search (None when no hashtag or keyword is set).
+        content_type: Selected media type, or "All".
+        selected_dates: Value of the date range input.
+        selected_tags: Selected hashtags.
+        caption_query: Caption keyword text.
+    """
+    if matches is not None and not len(matches):
+        st.warning("No posts match the selected hashtags / caption keywords.")
+        return
 
     # Date filtering using standard date format
     start_date, end_date = None, None
     
     if isinstance(selected_dates, (list, tuple)) and len(selected_dates) == 2:
-        start_date, end_date = selected_dates[0], selected_dates[1]
+        start_date, end_date = pd.Timestamp(selected_dates[0]), pd.Timestamp(selected_dates[1])
     elif isinstance(selected_dates, (datetime, pd.Timestamp)):
-        start_date = end_date = selected_dates
-    
-    # Print debug info (optional)
-    # st.write("Start:", start_date, "End:", end_date)
+        start_date = end_date = pd.Timestamp(selected_dates)
     
-    if start_date and end_date:
-        df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
-        account_df = account_df[(account_df['date'] >= start_date) & (account_df['date'] <= end_date)]
-        ig_post_df = ig_post_df[(ig_post_df['created_timestamp'] >= start_date) & (ig_post_df['created_timestamp'] <= end_date)]
-    else:
+    if not (start_date and end_date):
         st.warning("Invalid date selection.")
         return
 
-    df['engagement_rate'] = df['video_photo_engagement'] / df['video_photo_reach'].replace(0, pd.NA)
+    # Filtered posts (with engagement rates) and account insights, computed in metrics.py
+    df = filter_posts(basic_ig_df, matches, content_type, start_date, end_date)
+    account_df = filter_account(ig_account_df, start_date, end_date)
+    kpis = post_kpis(df, account_df)
 
     # --- SECOND ROW OF SCORECARDS (FILTERED) ---
     st.markdown("### 📈 Post Metrics")
     kpi1, kpi2, kpi3, kpi4, kpi5 = st.columns(5)
 
     with kpi1:
-        post_count = df[df.get('is_story', False) != True]['post_id'].nunique()
-        st.metric("Total Posts", f"{post_count:,}")
+        st.metric("Total Posts", f"{kpis['posts']:,}")
 
     with kpi2:
-        total_reach = df['video_photo_reach'].sum()
-        st.metric("Total Reach", f"{int(total_reach):,}")
+        st.metric("Total Reach", f"{int(kpis['reach']):,}")
 
     with kpi3:
-        follower_gain = account_df['follower_count'].sum() if 'follower_count' in ig_account_df.columns else 0
-        st.metric("Followers Gained", f"{int(follower_gain):,}")
+        st.metric("Followers Gained", f"{int(kpis['followers_gained']):,}")
         st.markdown("<span style='font-size: 0.75em; color: gray;'>*Metric only tracks 2 months back</span>", unsafe_allow_html=True)
 
     with kpi4:
-        total_likes = df['like_count'].sum()
-        st.metric("Like Count", f"{int(total_likes):,}")
+        st.metric("Like Count", f"{int(kpis['likes']):,}")
 
     with kpi5:
-        avg_eng_rate = df['engagement_rate'].mean()
+        avg_eng_rate = kpis["engagement_rate"]
         st.metric("Engagement Rate", f"{avg_eng_rate:.1%}" if pd.notna(avg_eng_rate) else "N/A")
 
      # --- SECTION 3: Top Performing Posts Table ---
     st.markdown("### 🔥 Top Performing Posts")
-    
-    ig_post_df['engagement'] = (
-        ig_post_df.get('like_count', 0) +
-        ig_post_df.get('comments_count', 0) +
-        ig_post_df.get('save_count', 0)
-    )
+    st.dataframe(top_posts(df))
 
-    ig_post_df['engagement_rate'] = ig_post_df['engagement'] / ig_post_df['video_photo_impressions'].replace(0, pd.NA)
-    
-    post_id_col = "post_id" if "post_id" in df.columns else "id"
+    view_key = (content_type, start_date, end_date, tuple(selected_tags), caption_query.lower())
+    draw_hashtag_performance(basic_ig_df, df, view_key)
 
-    top_posts = (
-        ig_post_df[['posted_on', 'post_caption', 'video_photo_reach', 'like_count', 'video_photo_saved']]
-        .sort_values(by='video_photo_reach', ascending=False)
-        .dropna(subset=['video_photo_reach'])
-        .head(10)
-        .copy()
-    )
+    draw_engagement_chart(basic_ig_df, ig_account_df, df, account_df, view_key)
 
-    top_posts.columns = ['Posted On', 'Caption', 'Reach', 'Likes', 'Saves']
 
-    st.dataframe(top_posts.reset_index(drop=True))
+def main():
+    start_page()
+    # Before the first load, so the memory report's baseline leaves the tables out
+    track_session()
+    # Every section renders on each run, so pull all of their tables in one go
+    tables = get_data(required_tables(SECTION_TABLES))
+    basic_ig_df = tables["instagram_business__posts"]
+    ig_account_df = tables["user_insights"]
+    pa_df = tables["sp_analyzed_posts"]
+    follows_df = tables["account_info"]
+    st.title("📱 Social Post Breakdown")
+    render_memory_report()
+    render_connection_report()
+    render_data_status(TABLES, tables.keys())
 
-    # --- SECTION 4: Engagement Breakdown ---
-    st.markdown("### 📈 Engagement Over Time")
-    
-    # Metric selection dropdown
-    metric_options = {
-        "Reach": "video_photo_reach",
-        "Likes": "like_count",
-        "Saves": "video_photo_saved",
-        "Engagement Rate": "engagement_rate",
-        "Followers Gained": "follower_count"
-    }
-    selected_metric_label = st.selectbox("Metric to display:", list(metric_options.keys()), index=0)
-    selected_metric_col = metric_options[selected_metric_label]
-    
-    # Prepare post-level metrics
-    df['timestamp'] = pd.to_datetime(df['created_timestamp'])
-    df['date'] = df['timestamp'].dt.date
-    
-    # Followers Gained comes from ig_account_df
-    if selected_metric_label == "Followers Gained":
-        follower_df = account_df.copy()
-        follower_df['date'] = pd.to_datetime(follower_df['date']).dt.date
-        follower_df = follower_df.groupby('date')[selected_metric_col].sum().reset_index()
-        plot_df = follower_df.rename(columns={selected_metric_col: 'Value'})
-    else:
-        plot_df = df.groupby('date')[selected_metric_col].sum().reset_index()
-        plot_df = plot_df.rename(columns={selected_metric_col: 'Value'})
-    
-    # Plot full-width chart
-    fig = px.line(
-        plot_df,
-        x='date',
-        y='Value',
-        title=f"{selected_metric_label} Over Time",
-        labels={"date": "Date", "Value": selected_metric_label},
-        template="plotly_white"
-    )
-    
-    # Normalize timestamps
-    df['post_date'] = pd.to_datetime(df['created_timestamp']).dt.normalize()
-    post_lines = df[['post_date', 'post_caption']].drop_duplicates().copy()
-    
-    # Create hover text: Date + start of caption
-    post_lines['hover'] = post_lines.apply(
-        lambda row: f"{row['post_date'].strftime('%b %d, %Y')}<br>{row['post_caption'][:50]}..." if pd.notna(row['post_caption']) else f"{row['post_date'].strftime('%b %d, %Y')}<br>No caption",
-        axis=1
-    )
-    
-    # Add full-height vertical lines
-    for date in post_lines['post_date']:
-        fig.add_vline(
-            x=date,
-            line_dash="dot",
-            line_color="gray",
-            opacity=0.3
-        )
-    
-    # Add invisible scatter points for hovertext
-    fig.add_trace(go.Scatter(
-        x=post_lines['post_date'],
-        y=[plot_df['Value'].max()] * len(post_lines),
-        mode="markers",
-        marker=dict(size=8, color="rgba(0,0,0,0)"),
-        hovertext=post_lines['hover'],
-        hoverinfo="text",
-        showlegend=False
-    ))
-    st.plotly_chart(fig, use_container_width=True)
+    # --- SECTION 1: FILTERS ---
+    st.markdown("### 🔧 Filter Options")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Dynamically load media types from actual data
+        media_types = sorted(basic_ig_df['media_type'].dropna().unique())
+        content_type = st.selectbox("Content Type", ["All"] + media_types)
+
+    with col2:
+        default_end = basic_ig_df['day'].max()
+        default_start = default_end - timedelta(days=30)
+        selected_dates = st.date_input("Date Range", [default_start, default_end])
+
+    # Hashtag / caption keyword filters, answered from the inverted index (built once per refresh)
+    post_index = get_post_index(basic_ig_df, "instagram_business__posts")
+    col3, col4 = st.columns(2)
+
+    with col3:
+        selected_tags = st.multiselect("Hashtags", post_index["hashtag_options"], key="post_hashtags")
+
+    with col4:
+        caption_query = st.text_input("Caption contains", key="post_keywords")
+
+    # --- SECTION 2: SCORECARDS ---
+    st.markdown("### 📊 Account Overview")
+    sc1, sc2, sc3 = st.columns(3)
+
+    overview = account_overview(basic_ig_df, follows_df)
+    with sc1:
+        st.metric("Account", overview["account"])
+
+    with sc2:
+        total_followers = overview["followers"]
+        st.metric("Total Followers", f"{int(total_followers):,}" if pd.notna(total_followers) else "N/A")
+
+    with sc3:
+        media_count = overview["media_count"]
+        st.metric("Media Count", f"{int(media_count):,}" if pd.notna(total_followers) else "N/A")
 
+    # Filtered views of post data; 'day' and 'posted_on' come from ingest (filters leave the shared frames untouched)
+    matches = search(post_index, selected_tags, caption_query)
+    draw_filtered_posts(basic_ig_df, ig_account_df, matches, content_type, selected_dates, selected_tags, caption_query)
 
     # SECTION 5: Creative Analysis
     st.markdown("### Creative Insights")
     st.write("Below is data extracted from videos and Reels on this account. Full post analysis is coming soon as we continue development.")
     col_left, col_right = st.columns(2)
 
+    creative_options = {
+        "Post Theme": "general_theme",
+        "Main Imagery": "imagery_group",
+        "Background Imagery": "background_imagery"
+    }
+    X_OPTIONS = ['video_len', 'shot_count', 'object_count', 'caption_length', 'avg_shot_len']
+
+    # Every breakdown and trend line is computed together once per data refresh; the selectboxes only pick one
+    insights = get_creative_insights(pa_df, list(creative_options.values()), X_OPTIONS)
+
     with col_left:
-        st.markdown("#### 📊 Performance by Creative Element")
-        
-        creative_options = {
-            "Post Theme": "general_theme",
-            "Main Imagery": "imagery_group",
-            "Background Imagery": "background_imagery"
-        }
-    
-        selected_creative = st.selectbox("Break down reach by:", list(creative_options.keys()))
-        creative_col = creative_options[selected_creative]
-    
-        if creative_col in pa_df.columns and 'video_photo_reach' in pa_df.columns:
-            reach_summary = (
-                pa_df
-                .groupby(creative_col)
-                .agg(Average_Reach=('video_photo_reach', 'mean'), Post_Count=('video_photo_reach', 'count'))
-                .reset_index()
-                .rename(columns={creative_col: selected_creative})
-                .sort_values('Average_Reach', ascending=False)
-            )
+        draw_creative_breakdown(pa_df, insights, creative_options)
 
-    
-            fig_creative = px.bar(
-                reach_summary,
-                x=selected_creative,
-                y='Average_Reach',
-                hover_data={'Post_Count': True},
-                title=f"Average Reach by {selected_creative}",
-                template='plotly_white'
-            )
-            st.plotly_chart(fig_creative, use_container_width=True)
-        else:
-            st.info("Creative column or reach data missing in `pa_df`.")
-    
     with col_right:
-        # Make sure all needed columns exist
-        X_OPTIONS = ['video_len', 'shot_count', 'object_count', 'caption_length', 'avg_shot_len']
-        st.markdown("### 🎥 Reach vs. Creative Attributes")
-        
-        selected_x = st.selectbox("Choose a variable to compare with Reach:", X_OPTIONS)
-        
-        # Filter out rows with missing data in either selected or reach
-        filtered_df = pa_df[[selected_x, 'video_photo_reach']].dropna()
-        
-        fig = px.scatter(
-            filtered_df,
-            x=selected_x,
-            y='video_photo_reach',
-            trendline='ols',
-            title=f"Reach vs. {selected_x}",
-            labels={selected_x: selected_x.replace('_', ' ').title(), 'reach': 'Reach'},
-            opacity=0.7
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        
+        draw_creative_scatter(pa_df, insights, X_OPTIONS)
+
+    render_timing_report()
+    render_figure_cache_report()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,163 @@
+"""
+Inverted index over posts: normalized hashtags and caption words -> row positions.
+
+Built once per refresh of the posts table. A refresh keeps the cached rows first and
+appends the new ones (see parquet_cache.merge_increment), so the previous index is
+extended instead of rebuilt: postings for the unchanged leading rows (same post,
+caption and tags) are kept and only the rows after them are tokenized. Filtering is
+then set operations on sorted position arrays instead of substring scans over every
+caption.
+"""
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+from data_store import derived
+from ingest import find_all
+
+
+WORD_PATTERN = r"\w+"
+EMPTY = np.array([], dtype="int64")
+
+
+@st.cache_resource
+def _latest():
+    # Last index built per table, the starting point for the next incremental update
+    return {"indexes": {}, "lock": threading.Lock()}
+
+
+def _postings(lists, offset=0):
+    # Token -> sorted unique row positions, from an Arrow list array of tokens per row
+    parents = pc.list_parent_indices(lists).to_numpy().astype("int64") + offset
+    codes, vocabulary = pd.factorize(pc.list_flatten(lists).to_numpy(zero_copy_only=False))
+    if not len(codes):
+        return {}
+    order = np.lexsort((parents, codes))
+    codes, parents = codes[order], parents[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(codes)) + 1]
+    return {
+        vocabulary[codes[start]]: np.unique(positions)
+        for start, positions in zip(starts, np.split(parents, starts[1:]))
+    }
+
+
+def _lists(series):
+    # The Arrow list array behind a list column
+    lists = pa.array(series)
+    return lists.combine_chunks() if isinstance(lists, pa.ChunkedArray) else lists
+
+
+def _merge(kept, added):
+    # Postings of the kept rows plus those of the appended rows
+    merged = dict(kept)
+    for token, positions in added.items():
+        merged[token] = np.concatenate([merged.get(token, EMPTY), positions])
+    return merged
+
+
+def _truncate(postings, n_rows):
+    # Only the positions of the first n_rows rows
+    truncated = {token: positions[:np.searchsorted(positions, n_rows)] for token, positions in postings.items()}
+    return {token: positions for token, positions in truncated.items() if len(positions)}
+
+
+def _row_hashes(df):
+    # Per-row hash of the caption and tags, so a post edited inside the sync overlap is re-tokenized
+    columns = {}
+    if "post_caption" in df.columns:
+        columns["caption"] = df["post_caption"].astype("string")
+    if "hashtags" in df.columns:
+        columns["tags"] = pd.Series(pc.binary_join(_lists(df["hashtags"]), " ").to_pandas(), dtype="string")
+    if not columns:
+        return np.zeros(len(df), dtype="uint64")
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+
+def _finish(hashtags, words, post_ids, row_hashes):
+    return {
+        "n_rows": len(post_ids),
+        "post_ids": post_ids,
+        "row_hashes": row_hashes,
+        "hashtags": hashtags,
+        "words": words,
+        # Sorted vocabulary for prefix search, and tags by how many posts use them
+        "vocabulary": np.array(sorted(words), dtype=object),
+        "hashtag_options": sorted(hashtags, key=lambda tag: (-len(hashtags[tag]), tag)),
+    }
+
+
+def build_index(df, previous=None):
+    """
+    Indexes the posts' 'hashtags' list column (see ingest.parse_hashtags) and the words
+    of 'post_caption'. With a previous index, the leading rows with the same post_id,
+    caption and tags as its rows are reused and only the rest are tokenized.
+    """
+    post_ids = df["post_id"].to_numpy() if "post_id" in df.columns else np.arange(len(df))
+    row_hashes = _row_hashes(df)
+
+    # Length of the run of leading rows unchanged since the previous index
+    reuse = 0
+    if previous is not None:
+        shared = min(len(post_ids), previous["n_rows"])
+        changed = (
+            (post_ids[:shared] != previous["post_ids"][:shared])
+            | (row_hashes[:shared] != previous["row_hashes"][:shared])
+        )
+        differ = np.flatnonzero(changed)
+        reuse = int(differ[0]) if len(differ) else shared
+
+    new_rows = df.iloc[reuse:]
+    hashtags = _postings(_lists(new_rows["hashtags"]), reuse) if "hashtags" in df.columns else {}
+    words = _postings(find_all(new_rows["post_caption"], WORD_PATTERN), reuse) if "post_caption" in df.columns else {}
+    if reuse:
+        hashtags = _merge(_truncate(previous["hashtags"], reuse), hashtags)
+        words = _merge(_truncate(previous["words"], reuse), words)
+    return _finish(hashtags, words, post_ids, row_hashes)
+
+
+def get_post_index(df, name):
+    """
+    Returns the index for the current version of a posts table, extending the one
+    built for the previous version when the table was refreshed incrementally.
+
+    Args:
+        df: Shared posts table.
+        name: Table name, e.g. "instagram_business__posts".
+    """
+    registry = _latest()
+
+    def build():
+        with registry["lock"]:
+            previous = registry["indexes"].get(name)
+        index = build_index(df, previous)
+        with registry["lock"]:
+            registry["indexes"][name] = index
+        return index
+
+    return derived(df, ("post_index",), build)
+
+
+def search(index, hashtags=(), query=""):
+    """
+    Row positions of posts carrying any of the hashtags and, for every word in query,
+    a caption word starting with it.
+
+    Returns:
+        Sorted array of row positions, or None when no filter is set.
+    """
+    result = None
+    if hashtags:
+        result = np.unique(np.concatenate([index["hashtags"].get(tag, EMPTY) for tag in hashtags]))
+
+    vocabulary = index["vocabulary"]
+    for word in re.findall(WORD_PATTERN, query.lower()):
+        # Every vocabulary entry with the word as a prefix sits in one sorted range
+        lo, hi = np.searchsorted(vocabulary, [word, word + "\uffff"])
+        matches = np.unique(np.concatenate([EMPTY] + [index["words"][token] for token in vocabulary[lo:hi]]))
+        result = matches if result is None else np.intersect1d(result, matches, assume_unique=True)
+    return result
@@ -0,0 +1,141 @@
+"""
+Daily ad rollups materialized in the warehouse.
+
+The ad pages only ever show daily sums per campaign, ad set, ad, demographic group,
+device, platform and URL host, so those aggregates are defined once here and
+written to the ROLLUP_DATASET dataset (default "rollups"). The pages read them
+instead of the row-level tables. Refreshes are incremental: only the days from
+the rollup's watermark minus OVERLAP_DAYS are recomputed, since Meta restates
+recent days.
+
+    python rollups.py                    # refresh every rollup
+    python rollups.py daily_ad --full    # rebuild one from scratch
+
+Run it on a schedule (cron, Cloud Scheduler) after the source tables sync.
+"""
+import argparse
+import os
+from datetime import timedelta
+
+from backends import get_backend
+from parquet_cache import OVERLAP_DAYS, mark_invalidated
+
+
+ROLLUP_DATASET = os.environ.get("ROLLUP_DATASET", "rollups")
+
+# The ad metrics the pages read (clicks only comes from the URL report)
+AD_METRICS = ["spend", "impressions", "inline_link_clicks"]
+
+# Rollup name -> source table (dataset.table), its date column, grouping columns and summed metrics.
+# Every rollup keeps account_id and names its day column 'date'.
+ROLLUPS = {
+    "daily_campaign": {
+        "source": "facebook_ads.basic_campaign",
+        "date_col": "date",
+        "dims": ["campaign_name"],
+        "metrics": AD_METRICS,
+    },
+    "daily_ad_set": {
+        "source": "facebook_ads.basic_ad_set",
+        "date_col": "date",
+        "dims": ["campaign_name", "adset_name"],
+        "metrics": AD_METRICS,
+    },
+    "daily_ad": {
+        "source": "facebook_ads.basic_ad",
+        "date_col": "date",
+        "dims": ["campaign_name", "adset_name", "ad_name"],
+        "metrics": AD_METRICS,
+    },
+    "daily_demographics": {
+        "source": "client.ad_demographics",
+        "date_col": "date",
+        "dims": ["Breakdown", "Group"],
+        "metrics": AD_METRICS,
+    },
+    "daily_device": {
+        "source": "facebook_ads.delivery_device",
+        "date_col": "date",
+        "dims": ["device_platform"],
+        "metrics": AD_METRICS,
+    },
+    "daily_platform": {
+        "source": "facebook_ads.delivery_platform",
+        "date_col": "date",
+        "dims": ["publisher_platform"],
+        "metrics": AD_METRICS,
+    },
+    "daily_url_host": {
+        "source": "facebook_ads_facebook_ads.facebook_ads__url_report",
+        "date_col": "date_day",
+        "dims": ["url_host"],
+        "metrics": ["spend", "clicks", "impressions"],
+    },
+}
+
+
+def rollup_ref(project_id, name):
+    # Fully qualified table reference of a rollup
+    return f"{project_id}.{ROLLUP_DATASET}.{name}"
+
+
+def rollup_query(project_id, name, since=None):
+    """
+    Builds the SELECT computing a rollup from its source table.
+
+    Args:
+        project_id: Project holding the source tables.
+        name: Key in ROLLUPS.
+        since: First day to compute (default the whole history).
+    """
+    spec = ROLLUPS[name]
+    keys = ["account_id"] + spec["dims"]
+    select = [f"`{spec['date_col']}` AS `date`"] + [f"`{col}`" for col in keys]
+    select += [f"SUM(`{metric}`) AS `{metric}`" for metric in spec["metrics"]]
+
+    query = f"SELECT {', '.join(select)} FROM `{project_id}.{spec['source']}`"
+    if since is not None:
+        query += f" WHERE `{spec['date_col']}` >= '{since}'"
+    # Group by position: the day and every key column
+    return query + " GROUP BY " + ", ".join(str(i) for i in range(1, len(keys) + 2))
+
+
+def refresh(backend, project_id, name, full=False):
+    """
+    Brings one rollup up to date, recomputing only the days from its watermark minus
+    OVERLAP_DAYS (everything on the first run or with full=True). Pages that cache the
+    rollup under the same name are told to reload it.
+
+    Returns:
+        First day recomputed (None for a full rebuild).
+    """
+    target = rollup_ref(project_id, name)
+    since = None
+    if not full and backend.has_table(target):
+        watermark = backend.run_arrow(f"SELECT MAX(`date`) AS `watermark` FROM `{target}`")["watermark"][0].as_py()
+        if watermark is not None:
+            since = watermark - timedelta(days=OVERLAP_DAYS)
+
+    backend.materialize(target, rollup_query(project_id, name, since), "date", since)
+    mark_invalidated(name)
+    return since
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the daily ad rollups in the warehouse.")
+    parser.add_argument("names", nargs="*", help=f"Rollups to refresh (default all): {', '.join(ROLLUPS)}")
+    parser.add_argument("--project", default="bizbuddydemo-v3", help="Project with the source tables")
+    parser.add_argument("--full", action="store_true", help="Rebuild from the full history")
+    args = parser.parse_args()
+    unknown = sorted(set(args.names) - set(ROLLUPS))
+    if unknown:
+        parser.error(f"unknown rollups: {', '.join(unknown)}")
+
+    backend = get_backend(args.project)
+    for name in args.names or ROLLUPS:
+        since = refresh(backend, args.project, name, full=args.full)
+        print(f"Refreshed {rollup_ref(args.project, name)} " + (f"from {since}" if since else "(full rebuild)"))
+
+
+if __name__ == "__main__":
+    main()
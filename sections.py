@@ -0,0 +1,88 @@
+"""
+Page sections as Streamlit fragments, with rerun timings.
+
+A widget inside a @section function reruns only that function (st.fragment) instead
+of the whole script. The arguments it was last called with are kept by Streamlit, so
+a partial rerun reuses the frames, cubes and indexes the full run already looked up.
+Every run of a section is timed, as is every full run of the page, and the sidebar
+"Rerun timings" panel compares the two.
+"""
+import functools
+import logging
+import time
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+
+logger = logging.getLogger(__name__)
+
+# Timings kept per session for the report
+MAX_TIMINGS = 200
+FULL_PAGE = "Full page"
+
+
+def _partial_run():
+    # True while Streamlit is rerunning fragments only
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+
+def record_timing(name, seconds, partial):
+    # Append one timing to this session's history
+    timings = st.session_state.setdefault("rerun_timings", [])
+    timings.append({"section": name, "rerun": "partial" if partial else "full", "seconds": seconds})
+    del timings[:-MAX_TIMINGS]
+    logger.info("%s (%s rerun) took %.3fs", name, "partial" if partial else "full", seconds)
+
+
+def section(name):
+    """
+    Decorator turning a page section into a timed fragment.
+
+    Args:
+        name: Label for the section in the timing report.
+    """
+    def wrap(func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_timing(name, time.perf_counter() - started, _partial_run())
+
+        return st.fragment(timed)
+
+    return wrap
+
+
+def start_page():
+    # Marks the start of a full run, for the full-page timing
+    st.session_state["page_started"] = time.perf_counter()
+
+
+def timing_report():
+    """
+    Mean and latest seconds per section and rerun type, with the full page as its own row.
+
+    Returns:
+        DataFrame indexed by section with full/partial mean and last columns.
+    """
+    timings = pd.DataFrame(st.session_state.get("rerun_timings", []), columns=["section", "rerun", "seconds"])
+    if timings.empty:
+        return pd.DataFrame()
+    report = timings.groupby(["section", "rerun"])["seconds"].agg(["mean", "last", "count"]).unstack("rerun")
+    report.columns = [f"{rerun} {stat}" for stat, rerun in report.columns]
+    return report.sort_index(axis=1)
+
+
+def render_timing_report():
+    # Sidebar panel comparing full reruns with fragment reruns; call it at the end of a full run
+    started = st.session_state.pop("page_started", None)
+    if started is not None:
+        record_timing(FULL_PAGE, time.perf_counter() - started, False)
+    with st.sidebar.expander("⏱️ Rerun timings"):
+        st.caption("Seconds per run. A widget inside a section reruns only that section (partial).")
+        st.dataframe(timing_report().round(3))
@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import Future
+
+import streamlit as st
+
+
+@st.cache_resource
+def _flights():
+    # Calls in flight in this process, plus counters for the sidebar report
+    return {
+        "in_flight": {},
+        "stats": {"calls": 0, "executed": 0, "deduplicated": 0},
+        "lock": threading.Lock(),
+    }
+
+
+def do(key, fn):
+    """
+    Runs fn() at most once at a time per key. Callers that arrive while a call with
+    the same key is in flight wait for it and share its result (or its exception)
+    instead of starting their own.
+
+    Args:
+        key: Hashable identity of the call, e.g. the SQL text.
+        fn: Zero-argument callable doing the work.
+    """
+    flights = _flights()
+    with flights["lock"]:
+        flights["stats"]["calls"] += 1
+        future = flights["in_flight"].get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            flights["in_flight"][key] = future
+            flights["stats"]["executed"] += 1
+        else:
+            flights["stats"]["deduplicated"] += 1
+
+    if not leader:
+        return future.result()
+
+    try:
+        result = fn()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with flights["lock"]:
+            flights["in_flight"].pop(key, None)
+
+
+def stats():
+    # Snapshot of how many calls ran and how many were folded into another caller's
+    flights = _flights()
+    with flights["lock"]:
+        return dict(flights["stats"], in_flight=len(flights["in_flight"]))
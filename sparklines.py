@@ -0,0 +1,50 @@
+import numpy as np
+
+from downsample import lttb
+
+
+# Points per sparkline and the SVG box they are drawn in (stretched to the column width)
+SPARKLINE_POINTS = 60
+VIEW_WIDTH, VIEW_HEIGHT = 200, 60
+PADDING = 2
+
+
+def sparkline_path(x, y, max_points=SPARKLINE_POINTS):
+    """
+    SVG path data for a series scaled into the VIEW_WIDTH x VIEW_HEIGHT box, after
+    LTTB brings it down to max_points.
+
+    Args:
+        x: Sorted datetime64 or numeric x values.
+        y: Values at x.
+
+    Returns:
+        Path string ("M x,y L x,y ..."), empty for an empty series.
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype="float64")
+    if not len(x):
+        return ""
+    keep = lttb(x, y, max_points)
+    x, y = x[keep], np.nan_to_num(y[keep])
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype("int64")
+    x = x.astype("float64")
+
+    # Scale into the box (y grows downwards in SVG); a flat or single-point series sits mid-height
+    x_span, y_span = np.ptp(x), np.ptp(y)
+    px = (x - x.min()) / x_span * VIEW_WIDTH if x_span else np.linspace(0, VIEW_WIDTH, len(x))
+    inner = VIEW_HEIGHT - 2 * PADDING
+    py = VIEW_HEIGHT - PADDING - (y - y.min()) / y_span * inner if y_span else np.full(len(y), VIEW_HEIGHT / 2)
+    if len(px) == 1:
+        px, py = np.array([0, VIEW_WIDTH]), np.repeat(py, 2)
+    points = [f"{a:.1f},{b:.1f}" for a, b in zip(px, py)]
+    return "M" + " L".join(points)
+
+
+def sparkline_svg(x, y, color="blue", height=60, max_points=SPARKLINE_POINTS):
+    # Inline <svg> for st.markdown(unsafe_allow_html=True): one path, a few hundred bytes
+    return (
+        f"<svg viewBox='0 0 {VIEW_WIDTH} {VIEW_HEIGHT}' preserveAspectRatio='none' width='100%' height='{height}'>"
+        f"<path d='{sparkline_path(x, y, max_points)}' fill='none' stroke='{color}' stroke-width='2' "
+        "vector-effect='non-scaling-stroke'/></svg>"
+    )
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+import data_loader
+import parquet_cache
+from backends import LocalBackend
+
+
+DAYS = 400
+SPEC = {
+    "user_insights": {
+        "table_ref": "project.instagram_business.user_insights",
+        "columns": ["date", "follower_count"],
+        "date_col": "date",
+    },
+}
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    # One row per day for the last DAYS days, served by the local backend, with an empty Parquet cache
+    pytest.importorskip("duckdb")
+    today = pd.Timestamp("today").normalize()
+    insights = pd.DataFrame({
+        "date": pd.date_range(end=today, periods=DAYS, freq="D").date,
+        "follower_count": range(DAYS),
+    })
+    (tmp_path / "warehouse" / "instagram_business").mkdir(parents=True)
+    insights.to_parquet(tmp_path / "warehouse" / "instagram_business" / "user_insights.parquet", index=False)
+    monkeypatch.setattr(parquet_cache, "CACHE_DIR", tmp_path / "cache")
+    return LocalBackend(tmp_path / "warehouse")
+
+
+def sync(backend, start_date):
+    tables, _, _ = data_loader.sync_tables(backend, SPEC, {"user_insights": start_date})
+    return tables["user_insights"]
+
+
+def test_wider_window_refetches_earlier_days(backend):
+    today = pd.Timestamp("today").normalize()
+    assert len(sync(backend, (today - timedelta(days=10)).date())) == 11
+    assert len(sync(backend, (today - timedelta(days=100)).date())) == 101
+    assert len(sync(backend, None)) == DAYS
+
+
+def test_narrower_window_is_served_from_the_cache(backend):
+    today = pd.Timestamp("today").normalize()
+    assert len(sync(backend, None)) == DAYS
+    narrow = sync(backend, (today - timedelta(days=10)).date())
+    assert len(narrow) == 11
+    # The file still holds the whole history, so widening again needs no backfill
+    assert len(sync(backend, None)) == DAYS
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from ingest import parse_hashtags
+from post_index import build_index, search
+
+
+def posts(captions):
+    return parse_hashtags(pd.DataFrame({
+        "post_id": range(1, len(captions) + 1),
+        "post_caption": pd.Series(captions, dtype="string"),
+    }))
+
+
+def test_edited_caption_is_reindexed():
+    previous = build_index(posts(["sun #c", "sun #c", "sun #c"]))
+    index = build_index(posts(["sun #c", "sun #c", "rain #z"]), previous)
+
+    assert search(index, query="rain").tolist() == [2]
+    assert search(index, query="sun").tolist() == [0, 1]
+    assert search(index, hashtags=["c"]).tolist() == [0, 1]
+    assert search(index, hashtags=["z"]).tolist() == [2]
+
+
+def test_appended_rows_extend_the_previous_index():
+    previous = build_index(posts(["sun #c", "beach #b"]))
+    index = build_index(posts(["sun #c", "beach #b", "sunset #c"]), previous)
+
+    assert search(index, hashtags=["c"]).tolist() == [0, 2]
+    assert search(index, query="sun").tolist() == [0, 2]
+    assert index["hashtag_options"] == ["c", "b"]
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from data_store import memoize
+
+
+def build_index(df, date_col, metrics):
+    """
+    Sums the metrics per day and keeps their running totals over the sorted days, so
+    any window sum is the difference of two cumulative values.
+
+    Args:
+        df: Table with a datetime64 day column.
+        date_col: Day column to bucket on.
+        metrics: Numeric or boolean columns to sum ('rows' counts rows per day).
+
+    Returns:
+        Dict with 'days' (sorted datetime64[ns] array) and 'cumsum' (metric -> array
+        one longer than 'days', starting at 0).
+    """
+    grouped = df.groupby(date_col)
+    daily = grouped[list(metrics)].sum()
+    days = daily.index.to_numpy(dtype="datetime64[ns]")
+
+    cumsum = {"rows": np.concatenate(([0], np.cumsum(grouped.size().to_numpy(dtype="int64"))))}
+    for metric in metrics:
+        # Integer and boolean totals stay exact; everything else sums as float64
+        column = daily[metric]
+        exact = pd.api.types.is_integer_dtype(column) or pd.api.types.is_bool_dtype(column)
+        values = column.to_numpy(dtype="int64" if exact else "float64", na_value=0)
+        cumsum[metric] = np.concatenate(([0], np.cumsum(values)))
+    return {"days": days, "cumsum": cumsum}
+
+
+@memoize
+def get_index(df, date_col, metrics):
+    """
+    Returns the daily index for a shared table, building it the first time it is asked
+    for. The index lives as long as the frame does, so a refreshed table gets a new one.
+    """
+    return build_index(df, date_col, metrics)
+
+
+def _bounds(index, start, end):
+    # Positions of the first day >= start and the first day >= end (binary search)
+    edges = np.array([pd.Timestamp(start).to_datetime64(), pd.Timestamp(end).to_datetime64()], dtype="datetime64[ns]")
+    return np.searchsorted(index["days"], edges, side="left")
+
+
+def window_sum(index, metric, start, end):
+    # Total of a metric over the days in [start, end)
+    lo, hi = _bounds(index, start, end)
+    return index["cumsum"][metric][hi] - index["cumsum"][metric][lo]
+
+
+def window_series(index, metric, start, end):
+    # Daily values of a metric over [start, end), for sparklines and daily charts
+    lo, hi = _bounds(index, start, end)
+    return pd.Series(np.diff(index["cumsum"][metric][lo:hi + 1]), index=index["days"][lo:hi], name=metric)
+
+
+def last_day(index):
+    # Latest day in the index (None when it is empty)
+    return pd.Timestamp(index["days"][-1]) if len(index["days"]) else None
+
+
+def period_over_period(index, metric, end, days, start=None):
+    """
+    Compares the window [start, end) with the `days` days before start. start
+    defaults to `days` days before end.
+
+    Returns:
+        Tuple of (current total, previous total, percent change; 0 without a previous total).
+    """
+    end = pd.Timestamp(end)
+    start = end - pd.Timedelta(days=days) if start is None else pd.Timestamp(start)
+    current = window_sum(index, metric, start, end)
+    previous = window_sum(index, metric, start - pd.Timedelta(days=days), start)
+    delta_pct = (current - previous) / previous * 100 if previous > 0 else 0
+    return current, previous, delta_pct